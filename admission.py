@@ -0,0 +1,164 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import registry
+
+# ============================================
+# 🚦 ADMISSION CONTROL
+# Token buckets per client • upstream in-flight cap • duplicate request debounce
+# ============================================
+
+ADMISSION_RATE = float(os.getenv("ADMISSION_RATE", "0.5"))
+ADMISSION_BURST = float(os.getenv("ADMISSION_BURST", "5"))
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "16"))
+ADMISSION_RETRY_AFTER = float(os.getenv("ADMISSION_RETRY_AFTER", "2"))
+ADMISSION_MAX_CLIENTS = int(os.getenv("ADMISSION_MAX_CLIENTS", "50000"))
+ADMISSION_ADDRESS_RATE = float(os.getenv("ADMISSION_ADDRESS_RATE", "2"))
+ADMISSION_ADDRESS_BURST = float(os.getenv("ADMISSION_ADDRESS_BURST", "20"))
+
+admission_rejections = registry.counter(
+    "synchrony_admission_rejections_total",
+    "Requests turned away before doing upstream work",
+    ["path", "reason"]
+)
+admission_debounced = registry.counter(
+    "synchrony_admission_debounced_total",
+    "Requests answered with the result of an identical request already running",
+    ["path"]
+)
+
+
+class Busy(Exception):
+    def __init__(self, retry_after):
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"busy, retry in {self.retry_after}s")
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst, now):
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, rate, burst, now):
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+    def wait(self, rate):
+        # Seconds until a whole token is available
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / rate if rate > 0 else ADMISSION_RETRY_AFTER
+
+
+class RateLimiter:
+    # One bucket per key; idle keys are forgotten least recently used first
+    def __init__(self, rate=ADMISSION_RATE, burst=ADMISSION_BURST, max_keys=ADMISSION_MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, keys, now=None):
+        # -> 0 when every key had a token (one is spent from each), else
+        # seconds until they all will; nothing is spent on a rejection
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            buckets = []
+            for key in keys:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = TokenBucket(self.burst, now)
+                else:
+                    self._buckets.move_to_end(key)
+                    bucket.refill(self.rate, self.burst, now)
+                buckets.append(bucket)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            wait = max((bucket.wait(self.rate) for bucket in buckets), default=0.0)
+            if not wait:
+                for bucket in buckets:
+                    bucket.tokens -= 1
+            return wait
+
+
+class _Pending:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# Shared by every path, so the cap covers all upstream calls of this worker
+upstream_slots = threading.BoundedSemaphore(ADMISSION_MAX_IN_FLIGHT)
+
+# Login answers say which emails are registered (and suggest close ones), so
+# every login, from the UI or the API, also spends a token of its client
+# address. Session ids and emails are picked by the client; its address is
+# not. The bucket is sized for a classroom behind one NAT address
+address_limiter = RateLimiter(ADMISSION_ADDRESS_RATE, ADMISSION_ADDRESS_BURST)
+
+
+def client_address(request):
+    client = getattr(request, "client", None)
+    return client.host if client else "unknown"
+
+
+def admit_address(path, request):
+    # Raises Busy once this address has used up its logins
+    wait = address_limiter.take((f"address:{client_address(request)}",))
+    if wait:
+        admission_rejections.inc(path=path, reason="address_limit")
+        raise Busy(wait)
+
+
+class Admission:
+    # Gate in front of one upstream path (login, challenges). An identical
+    # request that is already running is joined rather than repeated; otherwise
+    # the in-flight cap and the client's buckets decide, without queueing
+    def __init__(self, path, limiter=None, slots=upstream_slots, retry_after=ADMISSION_RETRY_AFTER):
+        self.path = path
+        self.limiter = limiter or RateLimiter()
+        self.retry_after = retry_after
+        self._slots = slots
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def run(self, clients, key, fn, *args):
+        with self._lock:
+            pending = self._pending.get(key)
+            leader = pending is None
+            if leader:
+                if not self._slots.acquire(blocking=False):
+                    admission_rejections.inc(path=self.path, reason="in_flight")
+                    raise Busy(self.retry_after)
+                wait = self.limiter.take(clients)
+                if wait:
+                    self._slots.release()
+                    admission_rejections.inc(path=self.path, reason="rate_limit")
+                    raise Busy(wait)
+                pending = self._pending[key] = _Pending()
+        if not leader:
+            admission_debounced.inc(path=self.path)
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.result
+        try:
+            pending.result = fn(*args)
+            return pending.result
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            self._slots.release()
+            pending.done.set()
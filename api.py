@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+
+from fastapi import FastAPI, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel
+
+import app as synchrony
+import admission
+from admission import Busy
+
+# ============================================
+# 🔌 JSON API
+# Login • team • challenges • hints • ETags and Cache-Control for clients and CDNs
+# ============================================
+
+API_MAX_AGE = int(os.getenv("API_MAX_AGE", "60"))
+API_GZIP_MIN_SIZE = int(os.getenv("API_GZIP_MIN_SIZE", "500"))
+
+# Team and challenge payloads are the same for every member of a group
+SHARED = f"public, max-age={API_MAX_AGE}, stale-while-revalidate={API_MAX_AGE}"
+# Hints are counted per request, so only the student's own browser may keep them
+PERSONAL = f"private, max-age={API_MAX_AGE}"
+NO_STORE = "no-store"
+
+
+class LoginBody(BaseModel):
+    email: str
+
+
+def etag_matches(request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def json_response(request, payload, cache_control, status_code=200, headers=None):
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+    headers = dict(headers or {}, **{"Cache-Control": cache_control})
+    if status_code == 200:
+        headers["ETag"] = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        if etag_matches(request, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+    return Response(body, status_code=status_code, headers=headers, media_type="application/json")
+
+
+def error(request, status_code, code, message, **fields):
+    headers = {"Retry-After": str(fields["retry_after"])} if "retry_after" in fields else None
+    return json_response(request, dict(error=code, message=message, **fields), NO_STORE, status_code, headers)
+
+
+def busy(request, e):
+    return error(request, 429, "busy", str(e), retry_after=e.retry_after)
+
+
+def member_json(member):
+    return {"name": member.name, "topic": member.topic}
+
+
+def challenge_json(challenge):
+    return {
+        "challenge_number": challenge["challenge_number"],
+        "description": challenge["description"],
+        "topics_involved": challenge["topics_involved"],
+        "hint_levels": len(challenge["hints"]),
+    }
+
+
+def known_group(group_id):
+    # Unknown ids would otherwise get the built-in challenges (cacheable by
+    # any CDN) and start a generation each
+    return bool(synchrony.data_source.group_members(group_id))
+
+
+def group_challenges(group_id):
+    # API clients are often servers (an LMS) calling for many students from
+    # one address, so only the in-flight cap and the debounce apply here
+    lookup = (f"S-{group_id}", group_id)
+    return synchrony.challenge_admission.run((), lookup, synchrony.get_challenges_for_session, *lookup)
+
+
+def challenges_cache_control(found):
+    # The built-in set stands in until the group's own challenges exist
+    return NO_STORE if found is synchrony.MOCK_CHALLENGES else SHARED
+
+
+def create_api():
+    api = FastAPI(title="Synchrony API", version="1", openapi_url="/openapi.json", docs_url="/docs")
+    api.add_middleware(GZipMiddleware, minimum_size=API_GZIP_MIN_SIZE)
+
+    @api.post("/login")
+    def login(body: LoginBody, request: Request):
+        if "@" not in body.email:
+            return error(request, 422, "invalid_email", "Please enter a valid email address")
+        email = synchrony.normalize_email(body.email)
+        try:
+            admission.admit_address("api_login", request)
+            found = synchrony.login_admission.run((f"email:{email}",), email, synchrony.find_student_and_team, email)
+        except Busy as e:
+            return busy(request, e)
+        if found.student is None:
+            return error(request, 404, "not_found", f"{email} is not registered", suggestion=found.suggestion)
+        current = {"email": email, "name": found.student.name}
+        return json_response(request, {
+            "student": found.student._asdict(),
+            "session_id": f"S-{found.group_id}",
+            "team": [dict(member_json(member), you=synchrony.is_current_student(member, current)) for member in found.team],
+        }, NO_STORE)
+
+    @api.get("/groups/{group_id}/team")
+    def team(group_id: str, request: Request):
+        members = synchrony.data_source.group_members(group_id)
+        if not members:
+            return error(request, 404, "not_found", f"group {group_id} not found")
+        return json_response(request, {
+            "group_id": group_id,
+            "subject": synchrony.data_source.group_subject(group_id) or synchrony.DEFAULT_SUBJECT,
+            "members": [member_json(member) for member in members],
+        }, SHARED)
+
+    @api.get("/groups/{group_id}/challenges")
+    def challenges(group_id: str, request: Request):
+        if not known_group(group_id):
+            return error(request, 404, "not_found", f"group {group_id} not found")
+        try:
+            found = group_challenges(group_id)
+        except Busy as e:
+            return busy(request, e)
+        return json_response(request, {
+            "group_id": group_id,
+            "session_id": f"S-{group_id}",
+            "challenges": [challenge_json(challenge) for challenge in found],
+        }, challenges_cache_control(found))
+
+    @api.get("/groups/{group_id}/challenges/{challenge_number}/hints/{level}")
+    def hint(group_id: str, challenge_number: int, level: int, request: Request):
+        if not known_group(group_id):
+            return error(request, 404, "not_found", f"group {group_id} not found")
+        try:
+            found = group_challenges(group_id)
+        except Busy as e:
+            return busy(request, e)
+        if not 1 <= challenge_number <= len(found):
+            return error(request, 404, "not_found", f"challenge {challenge_number} not found")
+        hints = found[challenge_number - 1]["hints"]
+        if not 1 <= level <= len(hints):
+            return error(request, 404, "not_found", f"only {len(hints)} hints available")
+        synchrony.count_hint(group_id, level)
+        return json_response(request, {
+            "group_id": group_id,
+            "challenge_number": challenge_number,
+            "level": level,
+            "levels": len(hints),
+            "hint": hints[level - 1],
+        }, NO_STORE if found is synchrony.MOCK_CHALLENGES else PERSONAL)
+
+    return api
@@ -1,8 +1,31 @@
-import gradio as gr
-import pandas as pd
-import random
+from __future__ import annotations
+
+import hmac
 import json
-from datetime import datetime
+import math
+import os
+import threading
+import time
+from collections import Counter, OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import admission
+from admission import Admission, Busy
+from batch import BUNDLE_MAX_AGE, SHEETS, SYNCHRONY_BUNDLES, Bundles
+from chat import CHAT_HISTORY, ChatBus
+from dashboard import CohortCache, cohort_overview, view_from_payload, view_payload, with_hint_counts
+from fuzzy import LatestIndex, TrigramIndex
+from generation import ChallengeGenerator, make_backend
+from metrics import registry
+from sheets import sheet_cache
+from snapshot import SNAPSHOT_INTERVAL, SYNCHRONY_SNAPSHOT, SnapshotReader, read_status
+from store import SYNC_EXTERNAL, SYNC_INTERVAL, SYNCHRONY_DB, Store, SyncJob
+from startup import lazy_import, startup
+from sync import SheetSync
+
+# Imported on first use: gradio only when the UI is built, pandas with the first sheet
+gr = lazy_import("gradio")
+pd = lazy_import("pandas")
 
 # ============================================
 # 🌟 SYNCHRONY - DARK ACADEMIA
@@ -14,18 +37,132 @@ GOOGLE_SHEETS = "https://docs.google.com/spreadsheets/d/1rpR-E_RSooDkNDh-Q_1BDIe
 
 SHEET_ID = "1rpR-E_RSooDkNDh-Q_1BDIeGw4vfgmusNAfwPqATaW4"
 
-STUDENTS_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/gviz/tq?tqx=out:csv&sheet=Students"
-GROUPS_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/gviz/tq?tqx=out:csv&sheet=Groups"
-CHALLENGES_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/gviz/tq?tqx=out:csv&sheet=Challenges"
-
-current_student = {
-    "name": None,
-    "email": None,
-    "group_id": None,
-    "session_id": None,
-    "team_members": [],
-    "challenges": []
-}
+STUDENTS_URL = os.getenv("STUDENTS_URL", f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/gviz/tq?tqx=out:csv&sheet=Students")
+GROUPS_URL = os.getenv("GROUPS_URL", f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/gviz/tq?tqx=out:csv&sheet=Groups")
+CHALLENGES_URL = os.getenv("CHALLENGES_URL", f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/gviz/tq?tqx=out:csv&sheet=Challenges")
+
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+SESSION_IDLE_TIMEOUT = float(os.getenv("SESSION_IDLE_TIMEOUT", "3600"))
+CHAT_POLL_INTERVAL = float(os.getenv("CHAT_POLL_INTERVAL", "2"))
+QUEUE_MAX_SIZE = int(os.getenv("QUEUE_MAX_SIZE", "512"))
+CONCURRENCY_LIMIT = int(os.getenv("CONCURRENCY_LIMIT", "64"))
+MAX_THREADS = int(os.getenv("MAX_THREADS", str(max(40, 2 * CONCURRENCY_LIMIT))))
+WARM_RETRY_INTERVAL = float(os.getenv("WARM_RETRY_INTERVAL", "5"))
+INSTRUCTOR_KEY = os.getenv("INSTRUCTOR_KEY", "")
+INSTRUCTOR_PAGE_SIZE = int(os.getenv("INSTRUCTOR_PAGE_SIZE", "50"))
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "4096"))
+# A sync or snapshot process that missed this many checks in a row has stopped
+REFRESHER_MISSED_CHECKS = int(os.getenv("REFRESHER_MISSED_CHECKS", "3"))
+
+def new_session():
+    return {
+        "name": None,
+        "email": None,
+        "group_id": None,
+        "session_id": None,
+        # False for emails not on the roster, which are shown the demo group
+        "registered": False,
+        "team_members": [],
+        "roster_version": None,
+        "challenges": [],
+        "challenges_version": None,
+        "chat_cursor": 0,
+        "chat_window": deque(maxlen=CHAT_HISTORY),
+        "chat_lock": threading.Lock()
+    }
+
+def session_key(request):
+    return getattr(request, "session_hash", None) or "local"
+
+class SessionStore:
+    def __init__(self, max_sessions=SESSION_MAX, idle_timeout=SESSION_IDLE_TIMEOUT):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, request):
+        key = session_key(request)
+        now = time.monotonic()
+        with self._lock:
+            slot = self._sessions.get(key)
+            if slot is None:
+                slot = self._sessions[key] = [now, new_session()]
+            else:
+                slot[0] = now
+                self._sessions.move_to_end(key)
+            self._evict(now)
+            return slot[1]
+
+    def drop(self, request):
+        with self._lock:
+            self._sessions.pop(session_key(request), None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _evict(self, now):
+        # Least recently used sessions sit at the front
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        while self._sessions:
+            last_seen = next(iter(self._sessions.values()))[0]
+            if now - last_seen < self.idle_timeout:
+                break
+            self._sessions.popitem(last=False)
+
+sessions = SessionStore()
+
+class RenderCache:
+    # Rendered Markdown keyed by (page, group_id, data version, ...). Keys of
+    # an old version are never asked for again and fall off the LRU end
+    def __init__(self, max_entries=RENDER_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+        render_lookups.inc(page=key[0], result="miss" if value is None else "hit")
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def __len__(self):
+        return len(self._entries)
+
+render_cache = RenderCache()
+chat_bus = ChatBus()
+
+handler_seconds = registry.histogram("synchrony_handler_seconds", "Time spent in each UI handler", ["handler"])
+handler_errors = registry.counter("synchrony_handler_errors_total", "Handler calls that ended in an error message", ["handler"])
+fallbacks = registry.counter(
+    "synchrony_fallbacks_total",
+    "Responses served from built-in data (default group, mock team, mock challenges)",
+    ["kind", "reason"]
+)
+
+render_lookups = registry.counter("synchrony_render_cache_lookups_total", "Rendered page lookups", ["page", "result"])
+hint_requests = registry.counter("synchrony_hint_requests_total", "Hints shown, by level", ["level"])
+# group_id → hints requested by its members since startup
+group_hints = Counter()
+group_hints_lock = threading.Lock()
+
+@registry.collector
+def session_metrics():
+    return [
+        ("synchrony_sessions", "gauge", "Browser sessions held in memory", [({}, len(sessions))]),
+        ("synchrony_render_cache_entries", "gauge", "Rendered pages held in memory", [({}, len(render_cache))])
+    ]
 
 MOCK_CHALLENGES = [
     {
@@ -60,157 +197,725 @@ MOCK_CHALLENGES = [
     }
 ]
 
-def read_sheet_safe(url, sheet_name="Unknown"):
-    try:
-        df = pd.read_csv(url)
-        print(f"✅ Loaded {len(df)} rows from {sheet_name}")
-        return df
-    except Exception as e:
-        print(f"⚠️ Could not read {sheet_name}: {e}")
-        return pd.DataFrame()
+Student = namedtuple("Student", ["email", "name", "group_id"])
+# email is None when the Groups sheet has no member_emails column
+Member = namedtuple("Member", ["name", "topic", "email"], defaults=[None])
+Login = namedtuple("Login", ["student", "group_id", "team", "suggestion"])
 
-def get_students_in_group(group_id):
-    try:
-        groups_df = read_sheet_safe(GROUPS_URL, "Groups")
-        if groups_df.empty:
-            return [
-                {"name": "Omar Khalil", "topic": "Linked Lists"},
-                {"name": "Khaled Ibrahim", "topic": "Queues"},
-                {"name": "Layla Mahmoud", "topic": "Binary Search Trees"}
-            ]
-        group = groups_df[groups_df['group_id'] == group_id]
-        if group.empty:
-            return [
-                {"name": "Omar Khalil", "topic": "Linked Lists"},
-                {"name": "Khaled Ibrahim", "topic": "Queues"},
-                {"name": "Layla Mahmoud", "topic": "Binary Search Trees"}
-            ]
-        group_row = group.iloc[0]
-        member_names = str(group_row.get('member_names', '')).split(',')
-        topics = str(group_row.get('topics', '')).split(',')
+DEFAULT_SUBJECT = "Data Structures"
+
+MOCK_TEAM = (
+    Member("Omar Khalil", "Linked Lists"),
+    Member("Khaled Ibrahim", "Queues"),
+    Member("Layla Mahmoud", "Binary Search Trees")
+)
+
+def normalize_email(email):
+    return str(email).strip().lower()
+
+def normalize_name(name):
+    return " ".join(str(name or "").split()).casefold()
+
+def clean_cell(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    value = str(value).strip()
+    return value or None
+
+def column_or_none(df, column):
+    return df[column] if column in df.columns else [None] * len(df)
+
+def build_student_index(students_df):
+    index = {}
+    if students_df.empty or "email" not in students_df.columns:
+        return index
+    emails = students_df["email"].astype(str).str.strip().str.lower()
+    names = column_or_none(students_df, "name")
+    group_ids = column_or_none(students_df, "group_id")
+    for email, name, group_id in zip(emails, names, group_ids):
+        if email not in index:
+            index[email] = Student(email, clean_cell(name), clean_cell(group_id) or "G001")
+    return index
+
+def build_email_index(students_df):
+    if students_df.empty or "email" not in students_df.columns:
+        return TrigramIndex(())
+    return TrigramIndex(students_df["email"].dropna().astype(str).str.strip().str.lower())
+
+def build_group_index(groups_df):
+    index = {}
+    if groups_df.empty or "group_id" not in groups_df.columns:
+        return index
+    member_names = column_or_none(groups_df, "member_names")
+    topics = column_or_none(groups_df, "topics")
+    member_emails = column_or_none(groups_df, "member_emails")
+    for group_id, names, group_topics, emails in zip(groups_df["group_id"], member_names, topics, member_emails):
+        group_id = clean_cell(group_id)
+        if group_id is None or group_id in index:
+            continue
+        names = (clean_cell(names) or "").split(",")
+        group_topics = (clean_cell(group_topics) or "").split(",")
+        emails = (clean_cell(emails) or "").split(",")
         team_members = []
-        for i, name in enumerate(member_names):
+        for i, name in enumerate(names):
             name = name.strip()
-            topic = topics[i].strip() if i < len(topics) else "Data Structures"
+            topic = group_topics[i].strip() if i < len(group_topics) else "Data Structures"
+            email = normalize_email(emails[i]) if i < len(emails) else ""
             if name:
-                team_members.append({"name": name, "topic": topic})
-        if team_members:
-            return team_members
-        else:
-            return [
-                {"name": "Omar Khalil", "topic": "Linked Lists"},
-                {"name": "Khaled Ibrahim", "topic": "Queues"},
-                {"name": "Layla Mahmoud", "topic": "Binary Search Trees"}
-            ]
-    except Exception as e:
-        return [
-            {"name": "Omar Khalil", "topic": "Linked Lists"},
-            {"name": "Khaled Ibrahim", "topic": "Queues"},
-            {"name": "Layla Mahmoud", "topic": "Binary Search Trees"}
-        ]
+                team_members.append(Member(name, topic, email or None))
+        index[group_id] = tuple(team_members)
+    return index
 
-def get_challenges_for_session(session_id):
+def parse_hints(hints_json):
+    if not isinstance(hints_json, str):
+        return ()
     try:
-        challenges_df = read_sheet_safe(CHALLENGES_URL, "Challenges")
-        if challenges_df.empty:
-            return MOCK_CHALLENGES
-        session_challenges = challenges_df[challenges_df['session_id'] == session_id]
-        if session_challenges.empty:
-            return MOCK_CHALLENGES
-        challenges = []
-        for _, row in session_challenges.iterrows():
-            hints_json = row.get('hints_json', '[]')
-            try:
-                hints = json.loads(hints_json) if isinstance(hints_json, str) else []
-            except:
-                hints = []
+        hints = json.loads(hints_json)
+    except ValueError:
+        return ()
+    return tuple(hints) if isinstance(hints, list) else ()
+
+def parse_challenge_number(value, default):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return default
+
+def build_challenge_index(challenges_df):
+    # Rows are reachable by session_id and by group_id, hints decoded once
+    index = {}
+    if challenges_df.empty:
+        return index
+    session_ids = column_or_none(challenges_df, "session_id")
+    group_ids = column_or_none(challenges_df, "group_id")
+    numbers = column_or_none(challenges_df, "challenge_number")
+    descriptions = column_or_none(challenges_df, "description")
+    topics = column_or_none(challenges_df, "topics_involved")
+    hints = column_or_none(challenges_df, "hints_json")
+    rows = zip(session_ids, group_ids, numbers, descriptions, topics, hints)
+    for session_id, group_id, number, description, topics_involved, hints_json in rows:
+        keys = {clean_cell(session_id), clean_cell(group_id)} - {None}
+        for key in keys:
+            challenges = index.setdefault(key, [])
             challenges.append({
-                "challenge_number": row.get('challenge_number', len(challenges) + 1),
-                "description": row.get('description', 'No description'),
-                "topics_involved": row.get('topics_involved', 'N/A'),
-                "hints": hints
+                "challenge_number": parse_challenge_number(number, len(challenges) + 1),
+                "description": clean_cell(description) or "No description",
+                "topics_involved": clean_cell(topics_involved) or "N/A",
+                "hints": parse_hints(hints_json)
             })
-        if challenges:
-            return challenges
-        else:
-            return MOCK_CHALLENGES
+    return {key: tuple(challenges) for key, challenges in index.items()}
+
+def build_group_subject_index(groups_df):
+    if groups_df.empty or "group_id" not in groups_df.columns or "subject" not in groups_df.columns:
+        return {}
+    index = {}
+    for group_id, subject in zip(groups_df["group_id"], groups_df["subject"]):
+        group_id = clean_cell(group_id)
+        if group_id is not None and group_id not in index:
+            index[group_id] = clean_cell(subject) or DEFAULT_SUBJECT
+    return index
+
+# sheet name → last read error, cleared by the next successful read
+sheet_errors = {}
+
+def read_index_safe(url, sheet_name, build):
+    try:
+        index = sheet_cache.derive(url, sheet_name, build)
     except Exception as e:
-        return MOCK_CHALLENGES
+        print(f"⚠️ Could not read {sheet_name}: {e}")
+        sheet_errors[sheet_name] = str(e)
+        return {}
+    sheet_errors.pop(sheet_name, None)
+    return index
 
-def lookup_student(email):
+def read_sheet_safe(url, sheet_name="Unknown"):
+    try:
+        return sheet_cache.get(url, sheet_name)
+    except Exception as e:
+        print(f"⚠️ Could not read {sheet_name}: {e}")
+        return pd.DataFrame()
+
+class SheetSource:
+    def warm(self):
+        # Raises until every sheet has been downloaded and indexed once;
+        # the three downloads run side by side
+        sheets = [
+            (STUDENTS_URL, "Students", build_student_index),
+            (GROUPS_URL, "Groups", build_group_index),
+            (CHALLENGES_URL, "Challenges", build_challenge_index)
+        ]
+        with ThreadPoolExecutor(max_workers=len(sheets)) as pool:
+            for future in [pool.submit(self._warm_sheet, *sheet) for sheet in sheets]:
+                future.result()
+        with startup.phase("index emails"):
+            sheet_cache.derive(STUDENTS_URL, "Students", build_email_index)
+
+    def _warm_sheet(self, url, sheet_name, build):
+        with startup.phase(f"warm {sheet_name}"):
+            sheet_cache.derive(url, sheet_name, build)
+
+    def find_student(self, email):
+        return read_index_safe(STUDENTS_URL, "Students", build_student_index).get(email)
+
+    def suggest_email(self, email):
+        index = read_index_safe(STUDENTS_URL, "Students", build_email_index)
+        return index.suggest(email) if index else None
+
+    def group_members(self, group_id):
+        return read_index_safe(GROUPS_URL, "Groups", build_group_index).get(group_id)
+
+    def group_subject(self, group_id):
+        return read_index_safe(GROUPS_URL, "Groups", build_group_subject_index).get(group_id)
+
+    def challenges(self, lookup_key):
+        return read_index_safe(CHALLENGES_URL, "Challenges", build_challenge_index).get(lookup_key)
+
+    def miss_reason(self, sheet_name):
+        if sheet_name in sheet_errors:
+            return "fetch_error"
+        url, build = {
+            "Students": (STUDENTS_URL, build_student_index),
+            "Groups": (GROUPS_URL, build_group_index),
+            "Challenges": (CHALLENGES_URL, build_challenge_index)
+        }[sheet_name]
+        return "no_match" if read_index_safe(url, sheet_name, build) else "empty_sheet"
+
+    def data_version(self, sheet_name):
+        url = {"Students": STUDENTS_URL, "Groups": GROUPS_URL, "Challenges": CHALLENGES_URL}[sheet_name]
+        # A cache hit, or the refresh once the sheet has gone stale
+        read_sheet_safe(url, sheet_name)
+        return sheet_cache.version(url)
+
+    def cohort(self):
+        # -> (version, build); the view is rebuilt once one of the sheets is refreshed
+        return sheet_versions(), build_cohort_view
+
+    def down_sheets(self):
+        return sorted(sheet for sheet, state in sheet_cache.circuits().items() if state != "closed")
+
+class StoreSource:
+    def __init__(self, store):
+        self.store = store
+        self.emails = LatestIndex()
+
+    def warm(self):
+        if self.store.is_empty() and sync_job is not None:
+            with startup.phase("warm store"):
+                sync_job.run_once()
+        if self.store.is_empty():
+            raise RuntimeError("local store has no students yet")
+
+    def find_student(self, email):
+        row = self.store.find_student(email)
+        return Student(*row) if row else None
+
+    def suggest_email(self, email):
+        version = self.store.sync_state().get("Students", {}).get("synced_at")
+        return self.emails.get(version, lambda: self.store.load_students().keys()).suggest(email)
+
+    def group_members(self, group_id):
+        return tuple(Member(*row) for row in self.store.group_members(group_id))
+
+    def group_subject(self, group_id):
+        return self.store.group_subject(group_id)
+
+    def challenges(self, lookup_key):
+        return tuple(self.store.challenges(lookup_key))
+
+    def miss_reason(self, sheet_name):
+        if sheet_name not in self.store.sync_state():
+            return "fetch_error"
+        return "empty_sheet" if self.store.is_empty() else "no_match"
+
+    def data_version(self, sheet_name):
+        return self.store.sync_state().get(sheet_name, {}).get("synced_at")
+
+    def cohort(self):
+        # Built by the sync job (see CohortSync)
+        return self.store.cohort_version(), lambda: view_from_payload(self.store.cohort_view())
+
+    def down_sheets(self):
+        # As seen by the sync job (see SheetHealth), which may run in another process
+        health = self.store.sheet_health()
+        if health and time.time() - max(checked_at for _, checked_at in health.values()) > REFRESHER_MISSED_CHECKS * SYNC_INTERVAL:
+            return sorted(health)
+        return sorted(sheet for sheet, (healthy, _) in health.items() if not healthy)
+
+class SnapshotSource:
+    # Reads the roster snapshot kept by `python snapshot.py`; every worker
+    # maps the same file instead of fetching and holding its own sheets
+    def __init__(self, reader):
+        self.reader = reader
+        self.emails = LatestIndex()
+
+    def warm(self):
+        with startup.phase("warm snapshot"):
+            if not self.reader.current().count("students"):
+                raise RuntimeError("roster snapshot has no students yet")
+
+    def _get(self, table, key):
+        try:
+            return self.reader.current().get(table, key)
+        except Exception as e:
+            print(f"⚠️ Could not read roster snapshot: {e}")
+            return None
+
+    def find_student(self, email):
+        row = self._get("students", email)
+        return Student(*row) if row else None
+
+    def suggest_email(self, email):
+        try:
+            snapshot = self.reader.current()
+        except Exception:
+            return None
+        return self.emails.get(snapshot.version, lambda: snapshot.keys("students")).suggest(email)
+
+    def group_members(self, group_id):
+        record = self._get("groups", group_id)
+        return tuple(Member(*member) for member in record[1]) if record else None
+
+    def group_subject(self, group_id):
+        record = self._get("groups", group_id)
+        return record[0] if record else None
+
+    def challenges(self, lookup_key):
+        rows = self._get("challenges", lookup_key)
+        return tuple(dict(row, hints=tuple(row["hints"])) for row in rows) if rows else None
+
+    def miss_reason(self, sheet_name):
+        try:
+            snapshot = self.reader.current()
+        except Exception:
+            return "fetch_error"
+        table = {"Students": "students", "Groups": "groups", "Challenges": "challenges"}[sheet_name]
+        return "no_match" if snapshot.count(table) else "empty_sheet"
+
+    def data_version(self, sheet_name):
+        try:
+            return self.reader.current().version
+        except Exception:
+            return None
+
+    def cohort(self):
+        # Built by the refresher alongside the roster
+        try:
+            snapshot = self.reader.current()
+        except Exception:
+            return None, lambda: view_from_payload(None)
+        return snapshot.version, lambda: view_from_payload(snapshot.get("cohort", "view"))
+
+    def down_sheets(self):
+        # As seen by the refresher, which writes its status after every check
+        status = read_status(self.reader.path)
+        if status is None:
+            return []
+        if time.time() - status["checked_at"] > REFRESHER_MISSED_CHECKS * SNAPSHOT_INTERVAL:
+            return list(SHEETS)
+        return status["down"]
+
+class BundleSource:
+    # Reads the per-group bundles written by `python batch.py`; each bundle
+    # and email shard is loaded on first access
+    def __init__(self, bundles):
+        self.bundles = bundles
+        self.emails = LatestIndex()
+
+    def warm(self):
+        with startup.phase("warm bundles"):
+            manifest = self.bundles.manifest()
+            if not manifest or not manifest["students"]:
+                raise RuntimeError(f"no bundles in {self.bundles.path} yet")
+
+    def find_student(self, email):
+        row = self.bundles.student(email)
+        return Student(email, *row) if row else None
+
+    def suggest_email(self, email):
+        return self.emails.get(self.data_version("Students"), self.bundles.emails).suggest(email)
+
+    def group_members(self, group_id):
+        bundle = self.bundles.group(group_id) if group_id else None
+        return tuple(Member(*member) for member in bundle["members"]) if bundle else None
+
+    def group_subject(self, group_id):
+        bundle = self.bundles.group(group_id) if group_id else None
+        return bundle["subject"] if bundle else None
+
+    def challenges(self, lookup_key):
+        bundle = self.bundles.group(lookup_key.removeprefix("S-")) if lookup_key else None
+        rows = bundle["challenges"].get(lookup_key) if bundle else None
+        return tuple(dict(row, hints=tuple(row["hints"])) for row in rows) if rows else None
+
+    def miss_reason(self, sheet_name):
+        manifest = self.bundles.manifest()
+        if manifest is None:
+            return "fetch_error"
+        return "no_match" if manifest["rows"].get(sheet_name) else "empty_sheet"
+
+    def data_version(self, sheet_name):
+        manifest = self.bundles.manifest()
+        return manifest["version"] if manifest else None
+
+    def cohort(self):
+        # Built by the batch run alongside the bundles
+        manifest = self.bundles.manifest()
+        return manifest and manifest["version"], lambda: view_from_payload(self.bundles.cohort())
+
+    def down_sheets(self):
+        # A batch run that fails leaves the last bundles in place, so only their age tells
+        manifest = self.bundles.manifest()
+        if manifest and time.time() - manifest["written_at"] > BUNDLE_MAX_AGE:
+            return list(SHEETS)
+        return []
+
+def group_records(groups_df):
+    subjects = build_group_subject_index(groups_df)
+    return {group_id: (subjects.get(group_id), team) for group_id, team in build_group_index(groups_df).items()}
+
+def challenge_records(challenges_df):
+    # Keyed by challenge number rather than position, so a slice of new rows
+    # lands beside the stored challenges instead of over them. A row without a
+    # number is numbered by its position, which only a full pass knows
+    return {
+        (lookup_key, challenge["challenge_number"]): challenge
+        for lookup_key, challenges in build_challenge_index(challenges_df).items()
+        for challenge in challenges
+    }
+
+def sheet_versions():
+    for url, sheet_name in ((STUDENTS_URL, "Students"), (GROUPS_URL, "Groups"), (CHALLENGES_URL, "Challenges")):
+        read_sheet_safe(url, sheet_name)
+    return tuple(sheet_cache.version(url) for url in (STUDENTS_URL, GROUPS_URL, CHALLENGES_URL))
+
+class CohortSync:
+    # Last sync task: the process that fetched the sheets builds the cohort
+    # view and stores it, so workers never fetch the sheets for the dashboard.
+    # Only a full pass that saw a new sheet version rebuilds it; those sheets
+    # were just read into the cache, so new-rows-only runs fetch nothing extra
+    def __init__(self, sheets):
+        self.sheets = sheets
+        self.versions = None
+
+    def __call__(self, store):
+        versions = tuple(sheet.version for sheet in self.sheets)
+        if None not in versions and versions != self.versions:
+            store.save_cohort_view(view_payload(*build_cohort_view()))
+            self.versions = versions
+
+class SheetHealth:
+    # Records which sheets answered the sync process, so workers that only
+    # read the store can warn about an outage they never see themselves.
+    # A stale copy served by an open circuit does not raise, hence the circuits
+    def __init__(self, sheets):
+        self.sheets = sheets
+
+    def __call__(self, store):
+        circuits = sheet_cache.circuits()
+        store.save_sheet_health({
+            sheet.sheet_name: sheet.healthy and circuits.get(sheet.sheet_name, "closed") == "closed"
+            for sheet in self.sheets
+        })
+
+def make_sync_job(store, interval=SYNC_INTERVAL):
+    tasks = {
+        "students": SheetSync("Students", lambda: STUDENTS_URL, build_student_index, Store.load_students, Store.apply_students),
+        "groups": SheetSync("Groups", lambda: GROUPS_URL, group_records, Store.load_groups, Store.apply_groups),
+        "challenges": SheetSync("Challenges", lambda: CHALLENGES_URL, challenge_records, Store.load_challenges, Store.apply_challenges)
+    }
+    sheets = list(tasks.values())
+    tasks["cohort"] = CohortSync(sheets)
+    tasks["health"] = SheetHealth(sheets)
+    return SyncJob(store, tasks, interval)
+
+def make_data_source():
+    # With SYNCHRONY_BUNDLES set, handlers read the precomputed group bundles.
+    # With SYNCHRONY_SNAPSHOT set, handlers read the shared snapshot file.
+    # With SYNCHRONY_DB set, handlers read only SQLite and the sheets are
+    # pulled into it by a background sync job (started by start_background),
+    # unless SYNC_EXTERNAL says a `python store.py` process syncs for all workers
+    if SYNCHRONY_BUNDLES:
+        return BundleSource(Bundles(SYNCHRONY_BUNDLES)), None
+    if SYNCHRONY_SNAPSHOT:
+        return SnapshotSource(SnapshotReader(SYNCHRONY_SNAPSHOT)), None
+    if not SYNCHRONY_DB:
+        return SheetSource(), None
+    store = Store(SYNCHRONY_DB)
+    return StoreSource(store), None if SYNC_EXTERNAL else make_sync_job(store)
+
+data_source, sync_job = make_data_source()
+
+readiness = {"ready": False, "error": None, "warmed_at": None}
+background_lock = threading.Lock()
+background_started = False
+
+def warm_until_ready():
+    with startup.phase("warm-up"):
+        while True:
+            try:
+                data_source.warm()
+            except Exception as e:
+                readiness["error"] = str(e)
+                print(f"⚠️ Not ready yet: {e}")
+                time.sleep(WARM_RETRY_INTERVAL)
+                continue
+            readiness.update(ready=True, error=None, warmed_at=time.time())
+            print("✅ Roster and challenges are warm")
+            break
+    startup.complete("warm-up")
+
+def start_background():
+    # Preloads Students/Groups/Challenges while the UI is built and the
+    # server binds its port, so the first login finds them cached
+    global background_started
+    with background_lock:
+        if background_started:
+            return
+        background_started = True
+    if sync_job is not None:
+        sync_job.start()
+    threading.Thread(target=warm_until_ready, daemon=True).start()
+
+def sheet_status():
+    # Asks the data source, since in snapshot, store and bundle modes another
+    # process fetches the sheets and this worker's circuits never open
+    down = data_source.down_sheets()
+    if not down:
+        return ""
+    return (
+        f"⚠️ *Google Sheets is not responding ({', '.join(down)}), so you may be seeing saved or sample data. "
+        "Synchrony reconnects automatically.*"
+    )
+
+def record_fallback(kind, sheet_name):
+    reason = data_source.miss_reason(sheet_name)
+    fallbacks.inc(kind=kind, reason=reason)
+    return reason
+
+def get_students_in_group(group_id):
+    team = data_source.group_members(clean_cell(group_id))
+    if not team:
+        record_fallback("team", "Groups")
+        return MOCK_TEAM
+    return team
+
+class GeneratedChallenges:
+    # group_id → (generation, challenges); the generation changes with every
+    # set generated for the group, so only that group's cached pages are
+    # re-rendered. With a local store the sets are kept there, so every
+    # worker serves the same set and it survives a restart
+    def __init__(self, store=None):
+        self.store = store
+        self.sets = {}
+
+    def get(self, group_id):
+        if self.store is not None:
+            return self.store.generated_challenges(group_id) or (0, None)
+        return self.sets.get(group_id, (0, None))
+
+    def save(self, group_id, challenges):
+        if self.store is not None:
+            self.store.save_generated_challenges(group_id, challenges)
+            return
+        generation, _ = self.sets.get(group_id, (0, None))
+        self.sets[group_id] = (generation + 1, challenges)
+
+challenge_backend = make_backend()
+challenge_generator = ChallengeGenerator(challenge_backend) if challenge_backend else None
+generated_challenges = GeneratedChallenges(getattr(data_source, "store", None))
+
+def challenges_version(group_id):
+    generation, _ = generated_challenges.get(group_id)
+    return (data_source.data_version("Challenges"), generation)
+
+def generate_challenges_later(group_id):
+    subject = data_source.group_subject(group_id) or DEFAULT_SUBJECT
+    topics = [member.topic for member in get_students_in_group(group_id)]
+    challenge_generator.submit(group_id, subject, topics, generated_challenges.save)
+
+def get_challenges_for_session(session_id, group_id=None):
+    group_id = clean_cell(group_id)
+    found = (
+        data_source.challenges(clean_cell(session_id))
+        or data_source.challenges(group_id)
+        or generated_challenges.get(group_id)[1]
+    )
+    if found:
+        return found
+    reason = record_fallback("challenges", "Challenges")
+    # Only a group the sheet really has no rows for gets a generated set; one
+    # whose rows could not be fetched (or are a stale copy) waits for the sheet
+    if (
+        challenge_generator is not None
+        and group_id is not None
+        and reason != "fetch_error"
+        and "Challenges" not in data_source.down_sheets()
+    ):
+        # Serve the mock set now; the generated set is picked up on the next load
+        generate_challenges_later(group_id)
+    return MOCK_CHALLENGES
+
+# Identical requests (same email, same session/group) running at once share
+# one upstream call, whichever browser session they come from
+login_admission = Admission("login")
+challenge_admission = Admission("challenges")
+
+def busy_message(busy):
+    return f"⏳ Synchrony is busy right now, please retry in {busy.retry_after}s"
+
+def find_login(email):
+    # -> Login without its team; an unknown email with a close match gets a
+    # suggestion instead of the mock group
+    student = data_source.find_student(email)
+    if student is not None:
+        return Login(student, student.group_id, (), None)
+    suggestion = data_source.suggest_email(email)
+    if suggestion:
+        return Login(None, None, (), suggestion)
+    record_fallback("student", "Students")
+    return Login(None, "G001", (), None)
+
+def find_student_and_team(email):
+    found = find_login(email)
+    return found._replace(team=get_students_in_group(found.group_id)) if found.group_id else found
+
+@handler_seconds.timed(handler="lookup_student")
+def lookup_student(email, request: gr.Request = None):
     try:
         if not email or "@" not in email:
-            return "❌ Please enter a valid email address"
+            yield "❌ Please enter a valid email address"
+            return
+        yield "⏳ Finding your study group..."
         name = email.split("@")[0].replace(".", " ").replace("_", " ").title()
-        try:
-            students_df = read_sheet_safe(STUDENTS_URL, "Students")
-            if not students_df.empty:
-                student = students_df[students_df['email'].str.lower() == email.lower()]
-                if not student.empty:
-                    student_row = student.iloc[0]
-                    name = student_row.get('name', name)
-                    group_id = student_row.get('group_id', 'G001')
-                else:
-                    group_id = "G001"
-            else:
-                group_id = "G001"
-        except:
-            group_id = "G001"
-        team_members = get_students_in_group(group_id)
-        session_id = f"S{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+        email_key = normalize_email(email)
+        admission.admit_address("login", request)
+        clients = (f"email:{email_key}",)
+        # Keys are tagged, so the API's combined lookups (keyed by email) are not joined
+        student, group_id, _, suggestion = login_admission.run(clients, ("student", email_key), find_login, email_key)
+        if suggestion:
+            yield f"❓ We couldn't find **{email_key}**. Did you mean **{suggestion}**?"
+            return
+        if student is not None:
+            name = student.name or name
+        session_id = f"S-{group_id}"
+        parts = [
+            f"### ✅ Welcome back, {name}!\n\n",
+            f"**Session ID:** `{session_id}`\n\n",
+        ]
+        yield "".join(parts) + "⏳ Meeting your team..."
+        # The student's token was spent above; this step is only capped and debounced
+        team_members = login_admission.run((), ("team", group_id), get_students_in_group, group_id)
+        current_student = sessions.get(request)
         current_student["name"] = name
         current_student["email"] = email
         current_student["group_id"] = group_id
         current_student["session_id"] = session_id
+        current_student["registered"] = student is not None
         current_student["team_members"] = team_members
-        welcome_msg = f"### ✅ Welcome back, {name}!\n\n"
-        welcome_msg += f"**Session ID:** `{session_id}`\n\n"
-        welcome_msg += f"**Synco says:**\n"
-        welcome_msg += f"Hey {', '.join([m['name'] for m in team_members])}! Welcome to your Synchrony study session. "
-        welcome_msg += f"You're all studying Data Structures with different focus areas—perfect for peer teaching!\n\n"
-        welcome_msg += f"**Your Team ({group_id}):** {', '.join([m['name'] for m in team_members])}\n\n"
-        welcome_msg += f"👉 Head to the **My Team** tab to see everyone's topics!"
-        return welcome_msg
+        current_student["roster_version"] = data_source.data_version("Groups")
+        current_student["challenges"] = []
+        with current_student["chat_lock"]:
+            current_student["chat_cursor"] = 0
+            current_student["chat_window"].clear()
+        team_names = ", ".join([m.name for m in team_members])
+        parts.append("**Synco says:**\n")
+        parts.append(f"Hey {team_names}! Welcome to your Synchrony study session. ")
+        parts.append("You're all studying Data Structures with different focus areas—perfect for peer teaching!\n\n")
+        parts.append(f"**Your Team ({group_id}):** {team_names}\n\n")
+        parts.append("👉 Head to the **My Team** tab to see everyone's topics!")
+        status = sheet_status()
+        if status:
+            parts.append(f"\n\n{status}")
+        yield "".join(parts)
+    except Busy as busy:
+        yield busy_message(busy)
     except Exception as e:
-        return f"❌ Error: {str(e)}"
+        handler_errors.inc(handler="lookup_student")
+        yield f"❌ Error: {str(e)}"
 
-def get_team_info():
+def is_current_student(member, current_student):
+    # By email when the Groups sheet lists member emails, else by exact name
+    if member.email:
+        return member.email == normalize_email(current_student.get("email") or "")
+    return normalize_name(member.name) == normalize_name(current_student.get("name"))
+
+@handler_seconds.timed(handler="get_team_info")
+def get_team_info(request: gr.Request = None):
+    current_student = sessions.get(request)
     if not current_student.get("team_members"):
         return "⚠️ Please login first in the Home tab"
-    output = f"## 👥 Your Study Squad - {current_student.get('group_id', 'G001')}\n\n"
-    output += f"**Session ID:** `{current_student.get('session_id', 'not started')}`\n\n"
-    output += "---\n\n"
-    for member in current_student["team_members"]:
-        user_name = current_student.get("name", "").lower()
-        member_name = member.get("name", "").lower()
-        is_you = " **(You)**" if user_name in member_name or member_name in user_name else ""
-        output += f"### 🎓 {member['name']}{is_you}\n"
-        output += f"**Focus Area:** {member.get('topic', 'N/A')}\n\n"
-    output += "---\n\n💡 Collaborate, learn together, and grow!"
-    return output
+    key = ("team", current_student["group_id"], current_student["roster_version"])
+    head, members, foot = render_cache.get(key) or render_cache.put(key, render_team(current_student))
+    output = head
+    for member, title, details in members:
+        is_you = " **(You)**" if is_current_student(member, current_student) else ""
+        output += f"{title}{is_you}{details}"
+    return output + foot
 
-def load_challenges():
+def render_team(current_student):
+    # The page for the whole group, split where "(You)" may go
+    head = f"## 👥 Your Study Squad - {current_student.get('group_id', 'G001')}\n\n"
+    head += f"**Session ID:** `{current_student.get('session_id', 'not started')}`\n\n"
+    head += "---\n\n"
+    members = tuple(
+        (member, f"### 🎓 {member.name}", f"\n**Focus Area:** {member.topic or 'N/A'}\n\n")
+        for member in current_student["team_members"]
+    )
+    return head, members, "---\n\n💡 Collaborate, learn together, and grow!"
+
+@handler_seconds.timed(handler="load_challenges")
+def load_challenges(request: gr.Request = None):
+    current_student = sessions.get(request)
     if not current_student.get("session_id"):
-        return "⚠️ No active session. Please login first in the Home tab"
+        yield "⚠️ No active session. Please login first in the Home tab"
+        return
     try:
-        session_id = current_student["session_id"]
-        challenges = get_challenges_for_session(session_id)
+        lookup = (current_student["session_id"], current_student["group_id"])
+        version = challenges_version(current_student["group_id"])
+        key = ("challenges", *lookup, version)
+        cached = render_cache.get(key)
+        if cached is None:
+            # First load of this group's page for this version: stream it as it renders
+            team_names = ", ".join([m.name for m in current_student["team_members"]])
+            parts = [
+                "# 🎯 Your Collaborative Challenges\n\n",
+                f"**Session ID:** `{current_student['session_id']}` • **Team ({current_student['group_id']}):** {team_names}\n\n",
+            ]
+            yield "".join(parts) + "⏳ Loading your challenges..."
+            clients = (f"session:{session_key(request)}",)
+            challenges = challenge_admission.run(clients, lookup, get_challenges_for_session, *lookup)
+            parts.append("**Synco says:** Here are your collaborative challenges! Work together, discuss your approaches, ")
+            parts.append("and request hints when needed. Ready? Let's go!\n\n")
+            parts.append("---\n\n")
+            for challenge in challenges:
+                parts.append(f"## Challenge {challenge['challenge_number']}\n\n")
+                parts.append(f"{challenge['description']}\n\n")
+                parts.append(f"**📚 Topics:** {challenge['topics_involved']}\n\n")
+                parts.append("💡 *Need help? Request a hint in the Hints tab!*\n\n")
+                parts.append("---\n\n")
+                yield "".join(parts)
+            available = ", ".join(f"Challenge {i} ({len(c['hints'])} levels)" for i, c in enumerate(challenges, start=1))
+            parts.append(f"💡 **Hints available:** {available}")
+            cached = render_cache.put(key, (challenges, "".join(parts)))
+        challenges, page = cached
         current_student["challenges"] = challenges
-        output = f"# 🎯 Your Collaborative Challenges\n\n"
-        output += f"**Synco says:** Here are your 3 collaborative challenges! Work together, discuss your approaches, "
-        output += f"and request hints when needed. Ready? Let's go!\n\n"
-        output += "---\n\n"
-        for challenge in challenges:
-            output += f"## Challenge {challenge['challenge_number']}\n\n"
-            output += f"{challenge['description']}\n\n"
-            output += f"**📚 Topics:** {challenge['topics_involved']}\n\n"
-            output += f"💡 *Need help? Request a hint in the Hints tab!*\n\n"
-            output += "---\n\n"
-        return output
+        current_student["challenges_version"] = version
+        status = sheet_status()
+        yield f"{page}\n\n{status}" if status else page
+    except Busy as busy:
+        yield busy_message(busy)
     except Exception as e:
-        return f"❌ Error loading challenges: {str(e)}"
+        handler_errors.inc(handler="load_challenges")
+        yield f"❌ Error loading challenges: {str(e)}"
+
+def count_hint(group_id, hint_level):
+    hint_requests.inc(level=hint_level)
+    with group_hints_lock:
+        group_hints[group_id] += 1
 
-def request_hint(challenge_num, hint_level_text):
+@handler_seconds.timed(handler="request_hint")
+def request_hint(challenge_num, hint_level_text, request: gr.Request = None):
+    current_student = sessions.get(request)
     if not current_student.get("session_id"):
         return "⚠️ No active session. Please login first"
     if not current_student.get("challenges"):
@@ -224,49 +929,107 @@ def request_hint(challenge_num, hint_level_text):
         hints = challenge.get("hints", [])
         if hint_level < 1 or hint_level > len(hints):
             return f"⚠️ Only {len(hints)} hints available"
-        hint = hints[hint_level - 1]
-        if hint_level == 1:
-            encouragement = "💡 **Think about it a bit more**"
-        elif hint_level == 2:
-            encouragement = "💭 **You're getting closer**"
-        else:
-            encouragement = "🎯 **Almost there**"
-        output = f"## {encouragement}\n\n"
-        output += f"**Challenge {challenge_num}** • Hint Level {hint_level}\n\n"
-        output += "---\n\n"
-        output += f"{hint}\n\n"
-        output += "---\n\n"
-        output += f"💪 You got this! Keep going!"
-        return output
+        count_hint(current_student["group_id"], hint_level)
+        key = (
+            "hint", current_student["session_id"], current_student["group_id"],
+            current_student["challenges_version"], challenge_idx, hint_level
+        )
+        return render_cache.get(key) or render_cache.put(key, render_hint(challenge_idx + 1, hint_level, hints[hint_level - 1]))
     except Exception as e:
+        handler_errors.inc(handler="request_hint")
         return f"❌ Error: {str(e)}"
 
-def send_message(message, history):
-    if not message.strip():
-        return history, ""
-    history.append({
-        "role": "user",
-        "content": f"**{current_student.get('name', 'You')}:** {message}"
-    })
-    if not current_student.get("team_members"):
-        response = "**Synco:** Please login first to chat with your team"
+def render_hint(challenge_num, hint_level, hint):
+    if hint_level == 1:
+        encouragement = "💡 **Think about it a bit more**"
+    elif hint_level == 2:
+        encouragement = "💭 **You're getting closer**"
     else:
-        other_members = [m for m in current_student["team_members"] 
-                        if m['name'].lower() != current_student.get('name', '').lower()]
-        if other_members:
-            member = random.choice(other_members)
-            responses = [
-                f"**{member['name']}:** That's a great point about {member['topic']}!",
-                f"**{member['name']}:** Interesting! Let me explain how {member['topic']} relates to that...",
-                f"**{member['name']}:** I agree! In {member['topic']}, we approach it similarly.",
-                f"**{member['name']}:** Good question! Let me draw a quick diagram...",
-                f"**Synco:** Excellent collaboration! Keep discussing!"
-            ]
-            response = random.choice(responses)
-        else:
-            response = "**Synco:** Great thinking!"
-    history.append({"role": "assistant", "content": response})
-    return history, ""
+        encouragement = "🎯 **Almost there**"
+    output = f"## {encouragement}\n\n"
+    output += f"**Challenge {challenge_num}** • Hint Level {hint_level}\n\n"
+    output += "---\n\n"
+    output += f"{hint}\n\n"
+    output += "---\n\n"
+    output += f"💪 You got this! Keep going!"
+    return output
+
+cohort_cache = CohortCache()
+
+def build_cohort_view():
+    students_df = read_sheet_safe(STUDENTS_URL, "Students")
+    groups_df = read_sheet_safe(GROUPS_URL, "Groups")
+    challenges_df = read_sheet_safe(CHALLENGES_URL, "Challenges")
+    return cohort_overview(students_df, groups_df, challenges_df)
+
+def cohort_view():
+    # Rebuilt (or reloaded) only for a new data version
+    version, build = data_source.cohort()
+    groups, summary = cohort_cache.get(version, build)
+    with group_hints_lock:
+        hints = dict(group_hints)
+    return with_hint_counts(groups, hints), summary
+
+@handler_seconds.timed(handler="instructor_page")
+def instructor_page(key, page, page_size=INSTRUCTOR_PAGE_SIZE):
+    # Without INSTRUCTOR_KEY the tab is hidden and the roster stays locked
+    if not INSTRUCTOR_KEY or not hmac.compare_digest((key or "").encode(), INSTRUCTOR_KEY.encode()):
+        return "⚠️ Enter the instructor key to see the cohort", None, 1
+    groups, summary = cohort_view()
+    page_size = max(1, int(page_size or INSTRUCTOR_PAGE_SIZE))
+    pages = max(1, math.ceil(len(groups) / page_size))
+    page = min(max(1, int(page or 1)), pages)
+    rows = groups.iloc[(page - 1) * page_size:page * page_size]
+    output = f"### 📊 Cohort Overview\n\n"
+    output += f"**Groups:** {summary['groups']:,} • **Students:** {summary['students']:,} "
+    output += f"({summary['unassigned']:,} without a group) • **Average group size:** {summary['average_size']:.1f}\n\n"
+    output += f"**Topics covered:** {summary['topics']:,} • **Groups without challenges:** {summary['without_challenges']:,} "
+    output += f"• **Hints requested:** {int(groups['hints_requested'].sum()):,}\n\n"
+    output += f"Page {page} of {pages}"
+    return output, rows, page
+
+def instructor_previous(key, page, page_size):
+    return instructor_page(key, (page or 1) - 1, page_size)
+
+def instructor_next(key, page, page_size):
+    return instructor_page(key, (page or 1) + 1, page_size)
+
+def end_session(request: gr.Request):
+    sessions.drop(request)
+
+def chat_entry(message, email):
+    role = "user" if message.email == email else "assistant"
+    return {"role": role, "content": f"**{message.author}:** {message.text}"}
+
+def sync_chat(current_student):
+    with current_student["chat_lock"]:
+        messages, cursor = chat_bus.poll(current_student["group_id"], current_student["chat_cursor"])
+        current_student["chat_cursor"] = cursor
+        for message in messages:
+            current_student["chat_window"].append(chat_entry(message, current_student["email"]))
+        return bool(messages)
+
+@handler_seconds.timed(handler="send_message")
+def send_message(message, request: gr.Request = None):
+    current_student = sessions.get(request)
+    if not message.strip():
+        return gr.skip(), ""
+    # Visitors shown the demo group never reach that group's real room
+    if not current_student.get("registered"):
+        return [
+            {"role": "user", "content": f"**You:** {message}"},
+            {"role": "assistant", "content": "**Synco:** Please login first to chat with your team"}
+        ], ""
+    chat_bus.publish(current_student["group_id"], current_student["email"], current_student["name"], message.strip())
+    sync_chat(current_student)
+    return list(current_student["chat_window"]), ""
+
+@handler_seconds.timed(handler="poll_messages")
+def poll_messages(request: gr.Request = None):
+    current_student = sessions.get(request)
+    if not current_student.get("registered") or not sync_chat(current_student):
+        return gr.skip()
+    return list(current_student["chat_window"])
 
 # ============================================
 # 🎨 DARK ACADEMIA AESTHETIC
@@ -493,9 +1256,19 @@ label {
 }
 """
 
-demo = gr.Blocks(css=custom_css, title="Synchrony • Collaborative Learning", theme=gr.themes.Soft())
+def build_demo():
+    with startup.phase("import gradio"):
+        gr.Blocks  # first attribute access imports it
+    with startup.phase("build ui"):
+        demo = gr.Blocks(css=custom_css, title="Synchrony • Collaborative Learning", theme=gr.themes.Soft())
+        with demo:
+            build_ui(demo)
+        # Full queue → new events are rejected at once instead of waiting
+        demo.max_threads = MAX_THREADS
+        demo.queue(max_size=QUEUE_MAX_SIZE, default_concurrency_limit=CONCURRENCY_LIMIT)
+    return demo
 
-with demo:
+def build_ui(demo):
     gr.Markdown("""
     # 🌟 Synchrony
     ## Where students teach students
@@ -504,6 +1277,8 @@ with demo:
     
     ---
     """)
+    status_display = gr.Markdown()
+    demo.load(fn=sheet_status, outputs=[status_display], concurrency_limit=None)
     
     with gr.Tab("🏠 Home"):
         with gr.Row():
@@ -531,15 +1306,15 @@ with demo:
                 login_output = gr.Markdown()
         
         register_btn.click(fn=lambda: None, js=f"() => window.open('{REGISTRATION_FORM}', '_blank')")
-        login_btn.click(fn=lookup_student, inputs=[email_input], outputs=[login_output])
-        email_input.submit(fn=lookup_student, inputs=[email_input], outputs=[login_output])
+        login_btn.click(fn=lookup_student, inputs=[email_input], outputs=[login_output], concurrency_limit=CONCURRENCY_LIMIT, concurrency_id="login")
+        email_input.submit(fn=lookup_student, inputs=[email_input], outputs=[login_output], concurrency_limit=CONCURRENCY_LIMIT, concurrency_id="login")
     
     with gr.Tab("👥 My Team"):
         gr.Markdown("## Your Study Squad")
         gr.Markdown("Meet your teammates and see what everyone's focusing on")
         team_display = gr.Markdown(value="⚠️ Please login first in the Home tab")
         refresh_btn = gr.Button("Refresh Team Info", variant="secondary")
-        refresh_btn.click(fn=get_team_info, outputs=[team_display])
+        refresh_btn.click(fn=get_team_info, outputs=[team_display], concurrency_limit=None)
     
     with gr.Tab("🎯 Challenges"):
         gr.Markdown("""
@@ -549,7 +1324,7 @@ with demo:
         """)
         load_btn = gr.Button("Load Challenges", variant="primary", size="lg")
         challenges_display = gr.Markdown(value="Click the button above to load your challenges")
-        load_btn.click(fn=load_challenges, outputs=[challenges_display])
+        load_btn.click(fn=load_challenges, outputs=[challenges_display], concurrency_limit=CONCURRENCY_LIMIT)
     
     with gr.Tab("💡 Hints"):
         gr.Markdown("""
@@ -564,7 +1339,33 @@ with demo:
         
         hint_btn = gr.Button("Get Hint", variant="primary", size="lg")
         hint_display = gr.Markdown(value="Select a challenge and hint level, then click the button")
-        hint_btn.click(fn=request_hint, inputs=[challenge_select, hint_level_select], outputs=[hint_display])
+        hint_btn.click(fn=request_hint, inputs=[challenge_select, hint_level_select], outputs=[hint_display], concurrency_limit=None)
+    
+    with gr.Tab("📊 Instructor", visible=bool(INSTRUCTOR_KEY)):
+        gr.Markdown("""
+        ## Instructor Dashboard
+        
+        Every group at a glance: size, topic coverage, challenges and hints requested
+        """)
+        
+        with gr.Row():
+            instructor_key = gr.Textbox(label="Instructor Key", type="password", scale=2)
+            page_size_select = gr.Dropdown(label="Groups per Page", choices=[25, 50, 100, 250], value=INSTRUCTOR_PAGE_SIZE, scale=1)
+            page_input = gr.Number(label="Page", value=1, precision=0, minimum=1, scale=1)
+        
+        with gr.Row():
+            previous_btn = gr.Button("◀ Previous", variant="secondary")
+            cohort_btn = gr.Button("Load Cohort", variant="primary")
+            next_btn = gr.Button("Next ▶", variant="secondary")
+        
+        cohort_summary_display = gr.Markdown()
+        cohort_table = gr.Dataframe(interactive=False, wrap=True)
+        
+        cohort_inputs = [instructor_key, page_input, page_size_select]
+        cohort_outputs = [cohort_summary_display, cohort_table, page_input]
+        cohort_btn.click(fn=instructor_page, inputs=cohort_inputs, outputs=cohort_outputs, concurrency_limit=4, concurrency_id="instructor")
+        previous_btn.click(fn=instructor_previous, inputs=cohort_inputs, outputs=cohort_outputs, concurrency_limit=4, concurrency_id="instructor")
+        next_btn.click(fn=instructor_next, inputs=cohort_inputs, outputs=cohort_outputs, concurrency_limit=4, concurrency_id="instructor")
     
     with gr.Tab("💬 Chat"):
         gr.Markdown("""
@@ -572,7 +1373,7 @@ with demo:
         
         Discuss challenges, share insights, and help each other learn
         
-        *Demo mode - responses are simulated*
+        *Messages are shared with everyone in your group*
         """)
         
         chatbot = gr.Chatbot(value=[], label="", height=500, type="messages")
@@ -581,8 +1382,12 @@ with demo:
             msg_input = gr.Textbox(label="", placeholder="Type your message...", scale=5)
             send_btn = gr.Button("Send", variant="primary", scale=1)
         
-        send_btn.click(fn=send_message, inputs=[msg_input, chatbot], outputs=[chatbot, msg_input])
-        msg_input.submit(fn=send_message, inputs=[msg_input, chatbot], outputs=[chatbot, msg_input])
+        chat_timer = gr.Timer(CHAT_POLL_INTERVAL)
+        send_btn.click(fn=send_message, inputs=[msg_input], outputs=[chatbot, msg_input], concurrency_limit=CONCURRENCY_LIMIT, concurrency_id="chat")
+        msg_input.submit(fn=send_message, inputs=[msg_input], outputs=[chatbot, msg_input], concurrency_limit=CONCURRENCY_LIMIT, concurrency_id="chat")
+        chat_timer.tick(fn=poll_messages, outputs=[chatbot], concurrency_limit=None)
+    
+    demo.unload(end_session)
     
     gr.Markdown("""
     ---
@@ -594,8 +1399,15 @@ with demo:
     Created by Maryam Shanabli • 2025
     """)
 
-print("\n🎨 DARK ACADEMIA AESTHETIC")
-print("📚 Oxford libraries • Scholarly elegance")
-print("✅ All features functional\n")
+if __name__ == "__main__":
+    startup.mark("imports")
+    print("\n🎨 DARK ACADEMIA AESTHETIC")
+    print("📚 Oxford libraries • Scholarly elegance")
+    print("✅ All features functional\n")
 
-demo.launch()
\ No newline at end of file
+    start_background()
+    demo = build_demo()
+    with startup.phase("bind port"):
+        demo.launch(max_threads=MAX_THREADS, prevent_thread_lock=True)
+    startup.complete("serving")
+    demo.block_thread()
@@ -0,0 +1,346 @@
+import argparse
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.parse import quote
+
+from dashboard import cohort_parts, finish_overview, merge_parts, parts_from_payload, parts_payload, view_payload
+from startup import lazy_import
+
+pd = lazy_import("pandas")
+
+# ============================================
+# 📦 BATCH BUNDLES
+# Chunked reads • hash partitions • process pool • one bundle per group
+# ============================================
+
+SYNCHRONY_BUNDLES = os.getenv("SYNCHRONY_BUNDLES", "")
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "50000"))
+BATCH_PARTITIONS = int(os.getenv("BATCH_PARTITIONS", "64"))
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", str(os.cpu_count() or 1)))
+BUNDLE_CACHE_SIZE = int(os.getenv("BUNDLE_CACHE_SIZE", "2048"))
+BUNDLE_MAX_AGE = float(os.getenv("BUNDLE_MAX_AGE", "86400"))
+
+SHEETS = ("Students", "Groups", "Challenges")
+
+# Layout of an output directory:
+#   manifest.json                written last; names the version being served
+#   v<version>/                  everything one run produced, never modified after
+#     groups/<group_id>.json.gz  subject, members and challenges of one group
+#     students/<shard>.json.gz   email → [name, group_id], sharded by email hash
+#     cohort.json.gz             the instructor dashboard's view of the whole cohort
+#   work/                        partitioned input and per-partition done markers
+
+
+def partition_of(key, partitions):
+    return zlib.crc32(key.encode()) % partitions
+
+
+def text(series):
+    return series.astype(str).str.strip().where(series.notna(), "")
+
+
+def partition_keys(sheet, chunk):
+    # Students are sharded by email, Groups and Challenges by group
+    if sheet == "Students":
+        return text(chunk["email"]).str.lower() if "email" in chunk.columns else None
+    if "group_id" in chunk.columns:
+        keys = text(chunk["group_id"])
+    else:
+        keys = pd.Series("", index=chunk.index)
+    if sheet == "Challenges" and "session_id" in chunk.columns:
+        # Rows keyed only by session belong to the group named in it
+        sessions = text(chunk["session_id"]).str.removeprefix("S-")
+        keys = keys.where(keys != "", sessions)
+    return keys
+
+
+def write_json_gz(path, payload):
+    # Written beside the target and renamed, so an interrupted run never
+    # leaves a truncated bundle behind
+    body = gzip.compress(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(), compresslevel=6, mtime=0)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(body)
+    os.replace(tmp, path)
+
+
+def read_json_gz(path):
+    with open(path, "rb") as f:
+        return json.loads(gzip.decompress(f.read()))
+
+
+def version_dir(out, version):
+    return os.path.join(out, f"v{version}")
+
+
+def group_path(root, group_id):
+    return os.path.join(root, "groups", f"{quote(group_id, safe='')}.json.gz")
+
+
+def shard_path(root, shard):
+    return os.path.join(root, "students", f"{shard:04d}.json.gz")
+
+
+def part_dir(out, part):
+    return os.path.join(out, "work", f"{part:04d}")
+
+
+def partition_inputs(sources, out, partitions, chunk_size, timings):
+    # Streams each sheet in chunks and appends every row to its partition's
+    # file, so no sheet is ever held in memory whole
+    rows = Counter()
+    for sheet, source in sources.items():
+        started = time.perf_counter()
+        chunks = pd.read_csv(source, chunksize=chunk_size, dtype=str)
+        timings["input read"] += time.perf_counter() - started
+        while True:
+            read_started = time.perf_counter()
+            chunk = next(chunks, None)
+            timings["input read"] += time.perf_counter() - read_started
+            if chunk is None:
+                break
+            split_started = time.perf_counter()
+            keys = partition_keys(sheet, chunk)
+            if keys is None:
+                break
+            chunk, keys = chunk[keys != ""], keys[keys != ""]
+            # A Series, since groupby takes a one-element list as a column name
+            parts = pd.Series([partition_of(key, partitions) for key in keys], index=chunk.index)
+            for part, rows_of_part in chunk.groupby(parts):
+                path = os.path.join(part_dir(out, part), f"{sheet}.csv")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                rows_of_part.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+            rows[sheet] += len(chunk)
+            timings["input split"] += time.perf_counter() - split_started
+        print(f"📥 Partitioned {rows[sheet]} {sheet} rows in {time.perf_counter() - started:.1f}s")
+    return rows
+
+
+def build_partition(out, root, part):
+    # Runs in a worker process: one partition's rows → its group bundles and
+    # email shard in the run's version directory
+    import app
+
+    timings = Counter()
+    started = time.perf_counter()
+    frames = {}
+    for sheet in SHEETS:
+        path = os.path.join(part_dir(out, part), f"{sheet}.csv")
+        frames[sheet] = pd.read_csv(path, dtype=str) if os.path.exists(path) else pd.DataFrame()
+    timings["read"] += time.perf_counter() - started
+
+    started = time.perf_counter()
+    students = app.build_student_index(frames["Students"])
+    groups = app.group_records(frames["Groups"]) if not frames["Groups"].empty else {}
+    challenges = defaultdict(dict)
+    for key, rows in app.build_challenge_index(frames["Challenges"]).items():
+        challenges[key.removeprefix("S-")][key] = [dict(row, hints=list(row["hints"])) for row in rows]
+    timings["build"] += time.perf_counter() - started
+
+    started = time.perf_counter()
+    for group_id in groups.keys() | challenges.keys():
+        subject, team = groups.get(group_id, (None, ()))
+        write_json_gz(group_path(root, group_id), {
+            "group_id": group_id,
+            "subject": subject,
+            "members": [list(member) for member in team],
+            "challenges": challenges.get(group_id, {}),
+        })
+    write_json_gz(shard_path(root, part), {email: [student.name, student.group_id] for email, student in students.items()})
+    os.makedirs(part_dir(out, part), exist_ok=True)
+    # This partition's share of the dashboard view, merged once all are built
+    cohort = parts_payload(*cohort_parts(frames["Students"], frames["Groups"], frames["Challenges"]))
+    with open(os.path.join(part_dir(out, part), "cohort.json"), "w") as f:
+        json.dump(cohort, f)
+    open(os.path.join(part_dir(out, part), "done"), "w").close()
+    timings["write"] += time.perf_counter() - started
+    return part, len(groups.keys() | challenges.keys()), len(students), dict(timings)
+
+
+def run(sources, out, partitions=BATCH_PARTITIONS, workers=BATCH_WORKERS, chunk_size=BATCH_CHUNK_SIZE, fresh=False):
+    work = os.path.join(out, "work")
+    marker = os.path.join(work, "partitioned.json")
+    if fresh:
+        shutil.rmtree(work, ignore_errors=True)
+    started = time.perf_counter()
+    stages = {}
+    timings = Counter()
+
+    # Stage 1: partition. An interrupted partitioning pass is redone from scratch.
+    # Each run builds into a new version directory, so groups dropped from the
+    # sheets disappear with the old version and workers never see a half-built run
+    if os.path.exists(marker):
+        with open(marker) as f:
+            state = json.load(f)
+        partitions = state["partitions"]
+        print(f"↩️ Resuming: inputs already partitioned into {partitions}")
+    else:
+        shutil.rmtree(work, ignore_errors=True)
+        os.makedirs(work)
+        stage_started = time.perf_counter()
+        rows = partition_inputs(sources, out, partitions, chunk_size, timings)
+        version = (read_manifest(out) or {}).get("version", 0) + 1
+        shutil.rmtree(version_dir(out, version), ignore_errors=True)
+        state = {"partitions": partitions, "rows": dict(rows), "version": version}
+        with open(marker, "w") as f:
+            json.dump(state, f)
+        stages["partition"] = time.perf_counter() - stage_started
+    root = version_dir(out, state["version"])
+    for directory in ("groups", "students"):
+        os.makedirs(os.path.join(root, directory), exist_ok=True)
+
+    # Stage 2: build bundles; finished partitions are skipped on resume
+    todo = [part for part in range(partitions) if not os.path.exists(os.path.join(part_dir(out, part), "done"))]
+    if len(todo) < partitions:
+        print(f"↩️ {partitions - len(todo)}/{partitions} partitions already built")
+    stage_started = time.perf_counter()
+    groups = students = 0
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(build_partition, out, root, part) for part in todo]
+        for done, future in enumerate(as_completed(futures), start=1):
+            part, built_groups, built_students, worker_timings = future.result()
+            groups += built_groups
+            students += built_students
+            timings.update({f"worker {name}": seconds for name, seconds in worker_timings.items()})
+            if done % max(1, len(futures) // 10) == 0 or done == len(futures):
+                print(f"🔨 Built {done}/{len(futures)} partitions")
+    stages["build"] = time.perf_counter() - stage_started
+
+    stage_started = time.perf_counter()
+    parts = []
+    for part in range(partitions):
+        with open(os.path.join(part_dir(out, part), "cohort.json")) as f:
+            parts.append(parts_from_payload(json.load(f)))
+    write_json_gz(os.path.join(root, "cohort.json.gz"), view_payload(*finish_overview(*merge_parts(parts))))
+    stages["cohort view"] = time.perf_counter() - stage_started
+
+    manifest = {
+        "version": state["version"],
+        "written_at": time.time(),
+        "partitions": partitions,
+        "rows": state["rows"],
+        "groups": sum(1 for entry in os.scandir(os.path.join(root, "groups")) if entry.name.endswith(".json.gz")),
+        "students": state["rows"].get("Students", 0),
+    }
+    tmp = os.path.join(out, "manifest.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(out, "manifest.json"))
+    shutil.rmtree(work, ignore_errors=True)
+    prune_versions(out, manifest["version"])
+
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ Built {groups} group bundles and {students} students in {elapsed:.1f}s "
+          f"({groups / elapsed if elapsed else 0:.0f} groups/sec) → {out} (v{manifest['version']})")
+    print("⏱️ Stages (wall clock)")
+    for name, seconds in stages.items():
+        print(f"   {name:<22}{seconds:>8.2f}s")
+    print("⏱️ Breakdown (worker steps summed over processes)")
+    for name, seconds in sorted(timings.items()):
+        print(f"   {name:<22}{seconds:>8.2f}s")
+    return manifest
+
+
+def prune_versions(out, version):
+    # The previous version is kept for workers that read the old manifest a
+    # moment ago; anything older is no longer reachable
+    for entry in os.scandir(out):
+        name = entry.name
+        if entry.is_dir() and name.startswith("v") and name[1:].isdigit() and int(name[1:]) < version - 1:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def read_manifest(out):
+    try:
+        with open(os.path.join(out, "manifest.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class Bundles:
+    # Read side used by the app: bundles and email shards are loaded on first
+    # use and kept in an LRU keyed by their versioned path, so a new batch run is
+    # picked up without restarting
+    def __init__(self, path, cache_size=BUNDLE_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self._manifest = (None, None)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def manifest(self):
+        try:
+            mtime = os.stat(os.path.join(self.path, "manifest.json")).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime != self._manifest[0]:
+            self._manifest = (mtime, read_manifest(self.path))
+        return self._manifest[1]
+
+    def group(self, group_id):
+        manifest = self.manifest()
+        if manifest is None:
+            return None
+        return self._load(group_path(version_dir(self.path, manifest["version"]), group_id))
+
+    def student(self, email):
+        manifest = self.manifest()
+        if manifest is None:
+            return None
+        root = version_dir(self.path, manifest["version"])
+        shard = self._load(shard_path(root, partition_of(email, manifest["partitions"])))
+        return shard.get(email) if shard else None
+
+    def emails(self):
+        manifest = self.manifest()
+        for shard in range(manifest["partitions"] if manifest else 0):
+            yield from self._load(shard_path(version_dir(self.path, manifest["version"]), shard)) or {}
+
+    def cohort(self):
+        # Read once per manifest version by the dashboard, which keeps it
+        manifest = self.manifest()
+        try:
+            return read_json_gz(os.path.join(version_dir(self.path, manifest["version"]), "cohort.json.gz")) if manifest else None
+        except FileNotFoundError:
+            return None
+
+    def _load(self, path):
+        # Paths name their version directory, so a new run never hits old entries
+        with self._lock:
+            if path in self._cache:
+                self._cache.move_to_end(path)
+                return self._cache[path]
+        try:
+            value = read_json_gz(path)
+        except FileNotFoundError:
+            value = None
+        with self._lock:
+            self._cache[path] = value
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+
+if __name__ == "__main__":
+    import app
+
+    parser = argparse.ArgumentParser(description="Precompute one bundle per group for the whole cohort")
+    parser.add_argument("out", nargs="?", default=SYNCHRONY_BUNDLES or "bundles", help="output directory")
+    parser.add_argument("--students", default=app.STUDENTS_URL, help="Students CSV file or sheet export URL")
+    parser.add_argument("--groups", default=app.GROUPS_URL, help="Groups CSV file or sheet export URL")
+    parser.add_argument("--challenges", default=app.CHALLENGES_URL, help="Challenges CSV file or sheet export URL")
+    parser.add_argument("--partitions", type=int, default=BATCH_PARTITIONS, help="hash partitions (and email shards)")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE, help="rows read at a time")
+    parser.add_argument("--fresh", action="store_true", help="discard an interrupted run (and its partly built version) instead of resuming it")
+    args = parser.parse_args()
+    sources = {"Students": args.students, "Groups": args.groups, "Challenges": args.challenges}
+    run(sources, args.out, args.partitions, args.workers, args.chunk_size, args.fresh)
@@ -0,0 +1,368 @@
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# ============================================
+# 📈 LOAD-TESTING BENCHMARK
+# Local fake Sheets server • concurrent simulated students
+# ============================================
+
+TOPICS = ["Binary Search Trees", "Linked Lists", "Queues", "Stacks", "Heaps", "Graphs", "Hash Tables"]
+SUBJECTS = ["Data Structures", "Algorithms", "Operating Systems"]
+
+
+def synthetic_sheets(students, group_size=3, seed=7):
+    rng = random.Random(seed)
+    groups = max(1, students // group_size)
+    student_lines = ["email,name,subject,topic,group_id,notes"]
+    members = {}
+    for i in range(students):
+        group_id = f"G{i % groups + 1:06d}"
+        topic = rng.choice(TOPICS)
+        name = f"Student {i}"
+        student_lines.append(f"student{i}@bench.edu,{name},{SUBJECTS[i % groups % len(SUBJECTS)]},{topic},{group_id},free text answer {i}")
+        members.setdefault(group_id, []).append((name, topic, f"student{i}@bench.edu"))
+    group_lines = ["group_id,subject,member_names,topics,member_emails"]
+    challenge_lines = ["session_id,group_id,challenge_number,description,topics_involved,hints_json"]
+    for n, (group_id, team) in enumerate(members.items()):
+        names = ", ".join(member[0] for member in team)
+        topics = ", ".join(member[1] for member in team)
+        emails = ", ".join(member[2] for member in team)
+        group_lines.append(f'{group_id},{SUBJECTS[n % len(SUBJECTS)]},"{names}","{topics}","{emails}"')
+        for number in range(1, 4):
+            hints = json.dumps([f"Hint {level} for challenge {number}" for level in range(1, 4)]).replace('"', '""')
+            challenge_lines.append(
+                f'S-{group_id},{group_id},{number},"Challenge {number} for {group_id}: teach {topics}","{topics}","{hints}"'
+            )
+    return {
+        "Students": "\n".join(student_lines).encode(),
+        "Groups": "\n".join(group_lines).encode(),
+        "Challenges": "\n".join(challenge_lines).encode(),
+    }
+
+
+class FakeSheetsServer:
+    def __init__(self, sheets, latency=0.0, port=0):
+        self.sheets = sheets
+        self.gzipped = {sheet: gzip.compress(body, compresslevel=5) for sheet, body in sheets.items()}
+        self.latency = latency
+        self.requests = 0
+        self.connections = 0
+        self.bytes_sent = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                server.connections += 1
+                super().setup()
+
+            def do_GET(self):
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                sheet = parse_qs(urlparse(self.path).query).get("sheet", [""])[0]
+                body = server.sheets.get(sheet)
+                if body is None:
+                    self.send_error(404)
+                    return
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/csv")
+                self.send_header("ETag", etag)
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = server.gzipped[sheet]
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                server.bytes_sent += len(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def url(self, sheet):
+        return f"http://127.0.0.1:{self._httpd.server_port}/spreadsheets/d/bench/gviz/tq?tqx=out:csv&sheet={sheet}"
+
+    def close(self):
+        self._httpd.shutdown()
+
+
+def current_rss(pid="self"):
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RssSampler:
+    def __init__(self, interval=0.005, pid="self"):
+        self.interval = interval
+        self.pid = pid
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self.peak = current_rss(self.pid)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss(self.pid))
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+# The handlers catch their own exceptions and answer with one of these
+ERROR_REPLIES = ("❌", "⚠️", "⏳ Synchrony is busy")
+
+
+def is_error_reply(result):
+    # Handlers return a markdown string, or a tuple whose first item is one
+    if isinstance(result, (tuple, list)) and result:
+        result = result[0]
+    return isinstance(result, str) and result.startswith(ERROR_REPLIES)
+
+
+def run_phase(name, call, requests, concurrency, pid="self"):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            failed = is_error_reply(call(i))
+        except Exception:
+            failed = True
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            errors += failed
+
+    with RssSampler(pid=pid) as rss:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, range(requests)))
+        wall = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "handler": name,
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "throughput_rps": requests / wall if wall else 0.0,
+        "peak_rss_mb": rss.peak / 2**20,
+    }
+
+
+class BenchRequest:
+    def __init__(self, session_hash):
+        self.session_hash = session_hash
+
+
+def drain(generator):
+    result = None
+    for result in generator:
+        pass
+    return result
+
+
+def bench_handlers(server, students, requests, concurrency):
+    import app
+    import admission
+    from admission import Admission, RateLimiter
+
+    app.STUDENTS_URL = server.url("Students")
+    app.GROUPS_URL = server.url("Groups")
+    app.CHALLENGES_URL = server.url("Challenges")
+    app.sheet_cache.invalidate()
+    # Replayed sessions would trip the per-client limits; time the handlers themselves
+    unlimited = dict(limiter=RateLimiter(rate=1e9, burst=1e9), slots=threading.BoundedSemaphore(concurrency))
+    app.login_admission = Admission("login", **unlimited)
+    app.challenge_admission = Admission("challenges", **unlimited)
+    admission.address_limiter = unlimited["limiter"]
+    groups = max(1, students // 3)
+    email = lambda i: f"student{i * 7919 % students}@bench.edu"
+    request = lambda i: BenchRequest(f"bench-{i % concurrency}")
+    group_id = lambda i: f"G{i * 7919 % groups + 1:06d}"
+    phases = [
+        ("lookup_student", lambda i: drain(app.lookup_student(email(i), request(i)))),
+        ("get_students_in_group", lambda i: app.get_students_in_group(group_id(i))),
+        ("get_challenges_for_session", lambda i: app.get_challenges_for_session(f"S-{group_id(i)}", group_id(i))),
+        ("load_challenges", lambda i: drain(app.load_challenges(request(i)))),
+        ("request_hint", lambda i: app.request_hint(str(i % 3 + 1), f"{i % 3 + 1} - hint", request(i))),
+        ("send_message", lambda i: app.send_message(f"message {i}", request(i))),
+    ]
+    return [run_phase(name, call, requests, concurrency) for name, call in phases]
+
+
+def bench_ingestion(sheets):
+    # Parse time and DataFrame memory, every column as object vs. the per-sheet schema
+    import pandas as pd
+    from sheets import SHEET_CSV_ENGINE, parse_csv
+
+    modes = [
+        ("all columns", lambda sheet, body: pd.read_csv(io.BytesIO(body))),
+        (f"schema ({SHEET_CSV_ENGINE})", lambda sheet, body: parse_csv(io.BytesIO(body), sheet)),
+    ]
+    rows = []
+    for sheet, body in sheets.items():
+        for mode, parse in modes:
+            started = time.perf_counter()
+            df = parse(sheet, body)
+            elapsed = time.perf_counter() - started
+            rows.append({
+                "sheet": sheet,
+                "mode": mode,
+                "columns": len(df.columns),
+                "parse_ms": elapsed * 1000,
+                "memory_mb": df.memory_usage(deep=True).sum() / 2**20,
+            })
+    return rows
+
+
+def bench_http(server, requests, students, concurrency, port):
+    from gradio_client import Client
+
+    env = dict(
+        os.environ,
+        STUDENTS_URL=server.url("Students"),
+        GROUPS_URL=server.url("Groups"),
+        CHALLENGES_URL=server.url("Challenges"),
+        GRADIO_SERVER_PORT=str(port),
+        GRADIO_ANALYTICS_ENABLED="False",
+        ADMISSION_RATE="1e9",
+        ADMISSION_BURST="1e9",
+        ADMISSION_MAX_IN_FLIGHT=str(concurrency),
+        ADMISSION_ADDRESS_RATE="1e9",
+        ADMISSION_ADDRESS_BURST="1e9",
+    )
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}/"
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                Client(url, verbose=False)
+                break
+            except Exception:
+                if time.time() > deadline or process.poll() is not None:
+                    raise RuntimeError("Gradio app did not start")
+                time.sleep(0.5)
+        local = threading.local()
+
+        def client():
+            if not hasattr(local, "client"):
+                local.client = Client(url, verbose=False)
+                local.client.predict(f"student{threading.get_ident() % students}@bench.edu", api_name="/lookup_student")
+            return local.client
+
+        phases = [
+            ("http:lookup_student", lambda i: client().predict(f"student{i * 7919 % students}@bench.edu", api_name="/lookup_student")),
+            ("http:load_challenges", lambda i: client().predict(api_name="/load_challenges")),
+            ("http:request_hint", lambda i: client().predict(str(i % 3 + 1), "1 - Gentle nudge", api_name="/request_hint")),
+        ]
+        # RSS is sampled from the server process, not this client
+        return [run_phase(name, call, requests, concurrency, process.pid) for name, call in phases]
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def print_report(size, results, ingestion, server):
+    print(
+        f"\n📈 {size:,} students • fake Sheets served {server.requests} requests over "
+        f"{server.connections} connections, {server.bytes_sent / 2**20:.1f} MiB"
+    )
+    print(f"{'handler':<30}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>12}{'peak RSS MiB':>14}{'errors':>8}")
+    for row in results:
+        print(
+            f"{row['handler']:<30}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+            f"{row['throughput_rps']:>12.0f}{row['peak_rss_mb']:>14.1f}{row['errors']:>8}"
+        )
+    print(f"\n{'sheet':<14}{'parse':<20}{'columns':>8}{'parse ms':>10}{'memory MiB':>12}")
+    for row in ingestion:
+        print(f"{row['sheet']:<14}{row['mode']:<20}{row['columns']:>8}{row['parse_ms']:>10.1f}{row['memory_mb']:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Synchrony handlers against a local fake Google Sheets server")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated roster sizes (1k to 500k)")
+    parser.add_argument("--requests", type=int, default=2000, help="calls per handler")
+    parser.add_argument("--concurrency", type=int, default=32, help="simulated students in flight")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added latency per fake sheet download")
+    parser.add_argument("--http", action="store_true", help="also drive the Gradio app over HTTP")
+    parser.add_argument("--port", type=int, default=7861, help="port for the Gradio app in --http mode")
+    parser.add_argument("--json", help="write all results to this JSON file")
+    args = parser.parse_args()
+
+    report = []
+    for size in [int(value) for value in args.sizes.split(",")]:
+        sheets = synthetic_sheets(size)
+        server = FakeSheetsServer(sheets, latency=args.latency_ms / 1000)
+        ingestion = bench_ingestion(sheets)
+        results = bench_handlers(server, size, args.requests, args.concurrency)
+        if args.http:
+            results += bench_http(server, max(1, args.requests // 10), size, args.concurrency, args.port)
+        print_report(size, results, ingestion, server)
+        report.append({
+            "students": size,
+            "sheet_requests": server.requests,
+            "sheet_connections": server.connections,
+            "sheet_bytes": server.bytes_sent,
+            "results": results,
+            "ingestion": ingestion,
+        })
+        server.close()
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump(report, out, indent=2)
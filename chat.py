@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+# ============================================
+# 💬 TEAM CHAT BUS
+# One room per group • bounded history • cursor polling
+# ============================================
+
+CHAT_HISTORY = int(os.getenv("CHAT_HISTORY", "100"))
+
+Message = namedtuple("Message", ["seq", "email", "author", "text", "sent_at"])
+
+
+class MemoryChatBackend:
+    def __init__(self, history=CHAT_HISTORY):
+        self.history = history
+        self._rooms = {}
+        self._seqs = {}
+        self._lock = threading.Lock()
+
+    def append(self, group_id, email, author, text):
+        with self._lock:
+            seq = self._seqs[group_id] = self._seqs.get(group_id, 0) + 1
+            room = self._rooms.get(group_id)
+            if room is None:
+                room = self._rooms[group_id] = deque(maxlen=self.history)
+            message = Message(seq, email, author, text, time.time())
+            room.append(message)
+            return message
+
+    def since(self, group_id, cursor):
+        with self._lock:
+            room = self._rooms.get(group_id)
+            if not room or room[-1].seq <= cursor:
+                return []
+            # Sequence numbers are contiguous, so the new tail is a slice
+            start = max(0, len(room) - (room[-1].seq - cursor))
+            return [room[i] for i in range(start, len(room))]
+
+
+# INCR, RPUSH and LTRIM in one step, so messages enter the list in sequence
+# order: a poll that has seen seq 6 can never miss a seq 5 pushed after it.
+# ARGV[1] is the JSON message without its seq, which is prepended here
+APPEND_SCRIPT = """
+local seq = redis.call('INCR', KEYS[2])
+redis.call('RPUSH', KEYS[1], '[' .. seq .. ',' .. string.sub(ARGV[1], 2))
+redis.call('LTRIM', KEYS[1], -tonumber(ARGV[2]), -1)
+return seq
+"""
+
+
+class RedisChatBackend:
+    # Needs EVALSHA/LRANGE, so redis-py or FakeRedis both work
+    def __init__(self, client, history=CHAT_HISTORY, prefix="synchrony:chat:"):
+        self.client = client
+        self.history = history
+        self.prefix = prefix
+        self._append = client.register_script(APPEND_SCRIPT)
+
+    def append(self, group_id, email, author, text):
+        key = self.prefix + group_id
+        sent_at = time.time()
+        body = json.dumps([email, author, text, sent_at])
+        seq = int(self._append(keys=[key, key + ":seq"], args=[body, self.history]))
+        return Message(seq, email, author, text, sent_at)
+
+    def since(self, group_id, cursor):
+        messages = []
+        for raw in self.client.lrange(self.prefix + group_id, 0, -1):
+            message = Message(*json.loads(raw))
+            if message.seq > cursor:
+                messages.append(message)
+        return messages
+
+
+class FakeRedis:
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def register_script(self, script):
+        # Only the chat append script is ever registered; its Python twin runs
+        # under the lock, as the real one runs atomically in Redis
+        if script != APPEND_SCRIPT:
+            raise NotImplementedError("FakeRedis only runs the chat append script")
+
+        def append(keys, args):
+            key, seq_key = keys
+            body, history = args
+            with self._lock:
+                seq = self._data[seq_key] = int(self._data.get(seq_key, 0)) + 1
+                items = self._data.setdefault(key, [])
+                items.append(f"[{seq},{body[1:]}".encode())
+                del items[:-int(history)]
+                return seq
+
+        return append
+
+    def lrange(self, key, start, end):
+        with self._lock:
+            items = self._data.get(key, [])
+            stop = None if end == -1 else end + 1
+            return list(items[start:stop])
+
+
+def make_chat_backend(name=None):
+    name = (name if name is not None else os.getenv("CHAT_BACKEND", "memory")).lower()
+    if name == "redis":
+        import redis
+
+        return RedisChatBackend(redis.Redis.from_url(os.getenv("CHAT_REDIS_URL", "redis://localhost:6379/0")))
+    if name == "fake-redis":
+        return RedisChatBackend(FakeRedis())
+    return MemoryChatBackend()
+
+
+class ChatBus:
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else make_chat_backend()
+
+    def publish(self, group_id, email, author, text):
+        return self.backend.append(group_id, email, author, text)
+
+    def poll(self, group_id, cursor):
+        messages = self.backend.since(group_id, cursor)
+        return messages, (messages[-1].seq if messages else cursor)
@@ -0,0 +1,144 @@
+import json
+import threading
+
+from startup import lazy_import
+
+pd = lazy_import("pandas")
+
+# ============================================
+# 📊 INSTRUCTOR DASHBOARD
+# Cohort-wide views in one vectorized pass • cached per data version
+# ============================================
+
+GROUP_COLUMNS = ["group_id", "subject", "members", "registered", "topics", "topic_count", "challenges", "hints_requested"]
+
+
+def text_column(df, column):
+    # Stripped strings with blanks as NaN; a missing column is all NaN
+    if column not in df.columns:
+        return pd.Series(None, index=df.index, dtype="object")
+    values = df[column].astype("object").str.strip()
+    return values.where(values != "")
+
+
+def split_column(group_ids, values):
+    # One row per comma-separated item, keyed by group_id
+    long = pd.DataFrame({"group_id": group_ids, "item": values.fillna("").str.split(",")}).explode("item")
+    long["item"] = long["item"].str.strip()
+    return long[long["item"] != ""].dropna()
+
+
+def cohort_parts(students_df, groups_df, challenges_df):
+    # -> (one row per group, registered students per group_id, topic names,
+    # students, students without a group). The parts of hash partitions of the
+    # sheets add up to the parts of the whole cohort
+    groups = pd.DataFrame({"group_id": text_column(groups_df, "group_id"), "subject": text_column(groups_df, "subject")})
+    groups["member_names"] = text_column(groups_df, "member_names")
+    groups["topics"] = text_column(groups_df, "topics")
+    groups = groups.dropna(subset=["group_id"]).drop_duplicates("group_id")
+
+    members = split_column(groups["group_id"], groups["member_names"]).groupby("group_id").size()
+    topics = split_column(groups["group_id"], groups["topics"]).drop_duplicates()
+
+    student_groups = text_column(students_df, "group_id")
+    # Rows keyed only by session_id ("S-<group_id>") count for their group
+    challenge_keys = text_column(challenges_df, "group_id")
+    by_session = challenge_keys.isna()
+    if by_session.any():
+        session_ids = text_column(challenges_df, "session_id")[by_session]
+        challenge_keys[by_session] = session_ids.str.replace(r"^S-", "", regex=True)
+
+    frame = groups[["group_id", "subject", "topics"]].set_index("group_id")
+    frame["members"] = members
+    frame["topic_count"] = topics.groupby("group_id").size()
+    frame["challenges"] = challenge_keys.dropna().value_counts()
+    students = int(students_df["email"].notna().sum()) if "email" in students_df.columns else 0
+    return frame.reset_index(), student_groups.dropna().value_counts(), set(topics["item"]), students, int(student_groups.isna().sum())
+
+
+def finish_overview(frame, registered, topics, students, unassigned):
+    # -> (one row per group, cohort-wide summary)
+    frame = frame.set_index("group_id")
+    frame["registered"] = registered
+    frame["hints_requested"] = 0
+    counts = ["members", "registered", "topic_count", "challenges"]
+    frame[counts] = frame[counts].astype(float).fillna(0).astype(int)
+    frame[["subject", "topics"]] = frame[["subject", "topics"]].fillna("")
+    frame = frame.reset_index().sort_values("group_id", ignore_index=True)[GROUP_COLUMNS]
+
+    summary = {
+        "groups": len(frame),
+        "students": students,
+        "unassigned": unassigned,
+        "average_size": float(frame["members"].mean()) if len(frame) else 0.0,
+        "without_challenges": int((frame["challenges"] == 0).sum()),
+        "topics": len(topics),
+    }
+    return frame, summary
+
+
+def cohort_overview(students_df, groups_df, challenges_df):
+    return finish_overview(*cohort_parts(students_df, groups_df, challenges_df))
+
+
+def merge_parts(parts):
+    # parts: (frame, registered, topics, students, unassigned) per partition
+    frames, registered, topics, students, unassigned = zip(*parts)
+    return (
+        pd.concat(frames, ignore_index=True),
+        pd.concat(registered).groupby(level=0).sum(),
+        set().union(*topics),
+        sum(students),
+        sum(unassigned),
+    )
+
+
+def parts_payload(frame, registered, topics, students, unassigned):
+    return {
+        "groups": json.loads(frame.to_json(orient="split", index=False)),
+        "registered": {group_id: int(count) for group_id, count in registered.items()},
+        "topics": sorted(topics),
+        "students": students,
+        "unassigned": unassigned,
+    }
+
+
+def parts_from_payload(payload):
+    frame = pd.DataFrame(payload["groups"]["data"], columns=payload["groups"]["columns"])
+    registered = pd.Series(payload["registered"], dtype="int64")
+    return frame, registered, set(payload["topics"]), payload["students"], payload["unassigned"]
+
+
+def view_payload(groups, summary):
+    # JSON form of a view built by the process that fetches the sheets, so
+    # workers serving snapshots, bundles or the store never fetch them again
+    return {"groups": json.loads(groups.to_json(orient="split", index=False)), "summary": summary}
+
+
+def view_from_payload(payload):
+    if not payload:
+        return cohort_overview(pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
+    return pd.DataFrame(payload["groups"]["data"], columns=payload["groups"]["columns"]), payload["summary"]
+
+
+def with_hint_counts(groups, hint_counts):
+    # Hint requests change between data versions, so they are merged in per view
+    groups = groups.copy()
+    groups["hints_requested"] = groups["group_id"].map(hint_counts).fillna(0).astype(int)
+    return groups
+
+
+class CohortCache:
+    # Holds only the view for the latest data version; concurrent requests
+    # for a new version wait for one build
+    def __init__(self):
+        self.key = None
+        self.value = None
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        with self._lock:
+            if key != self.key:
+                self.value = build()
+                self.key = key
+            return self.value
@@ -0,0 +1,121 @@
+import os
+import threading
+from collections import defaultdict
+
+from startup import lazy_import
+
+np = lazy_import("numpy")
+
+# ============================================
+# 🔎 FUZZY LOOKUP
+# Character-trigram postings • bounded edit distance • "did you mean…"
+# ============================================
+
+FUZZY_MAX_DISTANCE = int(os.getenv("FUZZY_MAX_DISTANCE", "2"))
+FUZZY_CANDIDATES = int(os.getenv("FUZZY_CANDIDATES", "32"))
+
+
+def trigrams(key):
+    # Padded so the first and last characters get trigrams of their own
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    return Pattern(a).distance(b, limit)
+
+
+class Pattern:
+    # Bit-parallel Levenshtein distance (Myers/Hyyrö): one pass over the
+    # other string with a few integer operations per character. The query's
+    # character masks are built once and reused for every candidate
+    __slots__ = ("text", "masks", "full", "last")
+
+    def __init__(self, text):
+        self.text = text
+        self.masks = {}
+        for i, char in enumerate(text):
+            self.masks[char] = self.masks.get(char, 0) | (1 << i)
+        self.full = (1 << len(text)) - 1
+        self.last = 1 << (len(text) - 1) if text else 0
+
+    def distance(self, other, limit):
+        # -> the distance, or limit + 1 once it must exceed limit
+        if abs(len(self.text) - len(other)) > limit:
+            return limit + 1
+        if not self.text:
+            return len(other)
+        masks, full, last = self.masks, self.full, self.last
+        positive, negative, score = full, 0, len(self.text)
+        for char in other:
+            equal = masks.get(char, 0)
+            vertical = equal | negative
+            horizontal = (((equal & positive) + positive) ^ positive) | equal
+            up = negative | (~(horizontal | positive) & full)
+            down = positive & horizontal
+            if up & last:
+                score += 1
+            elif down & last:
+                score -= 1
+            up = ((up << 1) | 1) & full
+            down = (down << 1) & full
+            positive = down | (~(vertical | up) & full)
+            negative = up & vertical
+        return min(score, limit + 1)
+
+
+class TrigramIndex:
+    # Keys are stored already normalized; postings map each trigram to the
+    # positions of the keys that contain it
+    def __init__(self, keys):
+        self.keys = list(dict.fromkeys(keys))
+        postings = defaultdict(list)
+        for position, key in enumerate(self.keys):
+            for gram in trigrams(key):
+                postings[gram].append(position)
+        self.postings = {gram: np.array(positions, dtype=np.uint32) for gram, positions in postings.items()}
+        self._empty = np.zeros(0, dtype=np.uint32)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def suggest(self, query, max_distance=FUZZY_MAX_DISTANCE, candidates=FUZZY_CANDIDATES):
+        # -> the closest key within max_distance edits, or None. Each edit
+        # breaks at most three trigrams, so a match shares at least one of the
+        # query's 3 × max_distance + 1 rarest trigrams; only those are scanned
+        if not query or not self.keys:
+            return None
+        postings = sorted((self.postings.get(gram, self._empty) for gram in trigrams(query)), key=len)
+        positions, hits = np.unique(np.concatenate(postings[:3 * max_distance + 1]), return_counts=True)
+        if len(hits) > candidates:
+            # Best-sharing candidates first, without sorting all of them
+            top = np.argpartition(hits, -candidates)[-candidates:]
+            positions = positions[top[np.argsort(-hits[top], kind="stable")]]
+        else:
+            positions = positions[np.argsort(-hits, kind="stable")]
+        pattern = Pattern(query)
+        best, best_distance = None, max_distance + 1
+        for position in positions.tolist():
+            key = self.keys[position]
+            distance = pattern.distance(key, best_distance - 1)
+            if distance < best_distance:
+                best, best_distance = key, distance
+                if distance == 0:
+                    break
+        return best
+
+
+class LatestIndex:
+    # The index for the latest roster version only; a new version is built
+    # once while concurrent callers wait for it
+    def __init__(self):
+        self.version = None
+        self.index = TrigramIndex(())
+        self._lock = threading.Lock()
+
+    def get(self, version, keys):
+        with self._lock:
+            if version != self.version:
+                self.index = TrigramIndex(keys())
+                self.version = version
+            return self.index
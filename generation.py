@@ -0,0 +1,264 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import weakref
+
+import requests
+
+# ============================================
+# 🤖 CHALLENGE & HINT GENERATION
+# Batched • cached by topic mix • pluggable backend
+# ============================================
+
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+GENERATION_CONCURRENCY = int(os.getenv("GENERATION_CONCURRENCY", "4"))
+GENERATION_RETRIES = int(os.getenv("GENERATION_RETRIES", "3"))
+GENERATION_TIMEOUT = float(os.getenv("GENERATION_TIMEOUT", "30"))
+
+SYSTEM_PROMPT = (
+    "You design collaborative peer-teaching challenges for university study groups. "
+    "Each student in the group is the expert on one topic. Write exactly 3 challenges: "
+    "each of the first challenges asks one topic expert to teach their topic and the others "
+    "to connect it to theirs, and the last asks everyone to design one system that uses all topics. "
+    "Refer to students only as 'the <topic> expert', never by name. "
+    "Each challenge has exactly 3 hints: a gentle nudge, clearer guidance, and an almost-complete answer. "
+    'Reply with JSON only: {"challenges": [{"description": str, "topics_involved": str, "hints": [str, str, str]}]}'
+)
+
+
+def cache_key(subject, topics):
+    return (subject.strip().lower(), tuple(sorted({topic.strip().lower() for topic in topics if topic.strip()})))
+
+
+def parse_challenges(content):
+    data = json.loads(content)
+    items = data.get("challenges") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        raise ValueError("response has no challenges")
+    challenges = []
+    for number, item in enumerate(items, start=1):
+        hints = item.get("hints") or []
+        if not item.get("description") or not isinstance(hints, list):
+            raise ValueError(f"challenge {number} is malformed")
+        challenges.append({
+            "challenge_number": number,
+            "description": str(item["description"]),
+            "topics_involved": str(item.get("topics_involved") or "N/A"),
+            "hints": tuple(str(hint) for hint in hints),
+        })
+    return tuple(challenges)
+
+
+class GroqBackend:
+    def __init__(self, api_key, url=GROQ_API_URL, model=GROQ_MODEL, timeout=GENERATION_TIMEOUT):
+        self.api_key = api_key
+        self.url = url
+        self.model = model
+        self.timeout = timeout
+
+    async def generate(self, subject, topics):
+        payload = {
+            "model": self.model,
+            "temperature": 0.7,
+            "response_format": {"type": "json_object"},
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": f"Subject: {subject}\nTopics: {', '.join(topics)}"},
+            ],
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        response = await asyncio.to_thread(requests.post, self.url, json=payload, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        return parse_challenges(response.json()["choices"][0]["message"]["content"])
+
+
+class StubBackend:
+    # Deterministic offline stand-in: same topics in, same challenges out
+    async def generate(self, subject, topics):
+        topics = list(topics) or ["the core concepts"]
+        everything = ", ".join(topics)
+        challenges = []
+        for topic in topics[:2]:
+            others = [other for other in topics if other != topic] or ["your own notes"]
+            challenges.append({
+                "challenge_number": len(challenges) + 1,
+                "description": (
+                    f"The {topic} expert, explain how {topic} works to the group with one worked example. "
+                    f"Everyone else, compare it with {', '.join(others)}: where would you pick one over the other?"
+                ),
+                "topics_involved": everything,
+                "hints": (
+                    f"Start with a small drawing of {topic} before talking about code",
+                    f"List the operations {topic} is good at and what each one costs",
+                    f"Put {topic} next to {others[0]} in a table of operations and their time complexity",
+                ),
+            })
+        challenges.append({
+            "challenge_number": len(challenges) + 1,
+            "description": f"Everyone: design ONE real-world {subject} system that uses ALL of {everything}. Explain how they work together.",
+            "topics_involved": everything,
+            "hints": (
+                "Think of a system that has to search, order and remember things",
+                f"Give each of {everything} one clear job in the system",
+                "Draw how a single request flows through every part of your design",
+            ),
+        })
+        return tuple(challenges)
+
+
+def make_backend(name=None):
+    name = (name if name is not None else os.getenv("CHALLENGE_BACKEND", "")).lower()
+    api_key = os.getenv("GROQ_API_KEY")
+    if name == "stub":
+        return StubBackend()
+    if name == "groq" or (not name and api_key):
+        if not api_key:
+            raise RuntimeError("CHALLENGE_BACKEND=groq needs GROQ_API_KEY")
+        return GroqBackend(api_key)
+    return None
+
+
+class ChallengeGenerator:
+    def __init__(self, backend, concurrency=GENERATION_CONCURRENCY, retries=GENERATION_RETRIES, base_delay=0.5):
+        self.backend = backend
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.base_delay = base_delay
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._pending = {}
+        self._counters = {"generated": 0, "cache_hits": 0, "retries": 0, "failures": 0}
+
+    async def generate_group(self, subject, topics):
+        key = cache_key(subject, topics)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._counters["cache_hits"] += 1
+                return cached
+            # Groups with the same topic mix share a single in-flight call
+            pending_key = (asyncio.get_running_loop(), key)
+            task = self._pending.get(pending_key)
+            if task is None:
+                task = self._pending[pending_key] = asyncio.ensure_future(self._generate(key, subject, topics))
+                task.add_done_callback(lambda _: self._forget(pending_key))
+            else:
+                self._counters["cache_hits"] += 1
+        return await task
+
+    async def generate_groups(self, groups):
+        # groups: iterable of (group_id, subject, topics)
+        groups = list(groups)
+        results = await asyncio.gather(
+            *(self.generate_group(subject, topics) for _, subject, topics in groups),
+            return_exceptions=True,
+        )
+        output = {}
+        for (group_id, _, _), result in zip(groups, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ Could not generate challenges for {group_id}: {result}")
+            else:
+                output[group_id] = result
+        return output
+
+    def generate_groups_sync(self, groups):
+        return asyncio.run(self.generate_groups(groups))
+
+    def submit(self, group_id, subject, topics, on_done):
+        # Fire-and-forget generation on a shared background loop
+        loop = self._background_loop()
+        future = asyncio.run_coroutine_threadsafe(self.generate_group(subject, topics), loop)
+
+        def finish(future):
+            try:
+                on_done(group_id, future.result())
+            except Exception as e:
+                print(f"⚠️ Could not generate challenges for {group_id}: {e}")
+
+        future.add_done_callback(finish)
+        return future
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["cached"] = len(self._cache)
+        return stats
+
+    async def _generate(self, key, subject, topics):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        for attempt in range(self.retries + 1):
+            try:
+                async with semaphore:
+                    challenges = await self.backend.generate(subject, topics)
+                break
+            except Exception:
+                if attempt == self.retries:
+                    with self._lock:
+                        self._counters["failures"] += 1
+                    raise
+                with self._lock:
+                    self._counters["retries"] += 1
+                await asyncio.sleep(self.base_delay * 2 ** attempt * (0.5 + random.random()))
+        with self._lock:
+            self._cache[key] = challenges
+            self._counters["generated"] += 1
+        return challenges
+
+    def _forget(self, pending_key):
+        with self._lock:
+            self._pending.pop(pending_key, None)
+
+    def _background_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, daemon=True).start()
+            return self._loop
+
+
+def challenge_rows(group_id, challenges):
+    for challenge in challenges:
+        yield {
+            "session_id": f"S-{group_id}",
+            "group_id": group_id,
+            "challenge_number": challenge["challenge_number"],
+            "description": challenge["description"],
+            "topics_involved": challenge["topics_involved"],
+            "hints_json": json.dumps(list(challenge["hints"])),
+        }
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Generate challenges for every group in a Groups table")
+    parser.add_argument("groups", help="Groups CSV file or sheet export URL")
+    parser.add_argument("--out", default="challenges.csv", help="where to write the Challenges table")
+    parser.add_argument("--backend", default=None, help="groq or stub (defaults to CHALLENGE_BACKEND)")
+    parser.add_argument("--subject", default="Data Structures", help="subject for groups without one")
+    args = parser.parse_args()
+
+    backend = make_backend(args.backend)
+    if backend is None:
+        parser.error("no backend configured: pass --backend stub or set GROQ_API_KEY")
+    groups_df = pd.read_csv(args.groups)
+    subjects = groups_df["subject"] if "subject" in groups_df.columns else [None] * len(groups_df)
+    groups = [
+        (str(group_id), subject if isinstance(subject, str) and subject else args.subject, str(topics).split(","))
+        for group_id, subject, topics in zip(groups_df["group_id"], subjects, groups_df["topics"].fillna(""))
+    ]
+    generator = ChallengeGenerator(backend)
+    results = generator.generate_groups_sync(groups)
+    rows = [row for group_id, challenges in results.items() for row in challenge_rows(group_id, challenges)]
+    pd.DataFrame(rows).to_csv(args.out, index=False)
+    print(f"✅ Generated challenges for {len(results)}/{len(groups)} groups → {args.out} {generator.stats()}")
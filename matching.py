@@ -0,0 +1,197 @@
+import argparse
+import heapq
+import itertools
+import math
+import os
+import re
+from collections import Counter, namedtuple
+
+import pandas as pd
+
+# ============================================
+# 🧩 COMPLEMENTARY-TOPIC MATCHING
+# Same subject • different focus areas
+# ============================================
+
+MATCH_GROUP_SIZE = int(os.getenv("MATCH_GROUP_SIZE", "3"))
+# How many of the emptiest open groups a late registrant is compared against
+MATCH_CANDIDATES = 8
+
+Registrant = namedtuple("Registrant", ["email", "name", "subject", "topic"])
+
+
+class Group:
+    __slots__ = ("group_id", "subject", "members", "topic_counts")
+
+    def __init__(self, group_id, subject):
+        self.group_id = group_id
+        self.subject = subject
+        self.members = []
+        self.topic_counts = Counter()
+
+    def add(self, registrant):
+        self.members.append(registrant)
+        self.topic_counts[registrant.topic] += 1
+
+
+def _cell(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    return str(value).strip()
+
+
+def _column(df, column):
+    return df[column] if column in df.columns else [None] * len(df)
+
+
+def read_registrants(students_df, subject_col="subject", topic_col="topic"):
+    rows = zip(
+        _column(students_df, "email"),
+        _column(students_df, "name"),
+        _column(students_df, subject_col),
+        _column(students_df, topic_col),
+    )
+    for email, name, subject, topic in rows:
+        email = _cell(email).lower()
+        if email:
+            yield Registrant(email, _cell(name) or email.split("@")[0], _cell(subject), _cell(topic))
+
+
+class Matcher:
+    def __init__(self, group_size=MATCH_GROUP_SIZE, prefix="G"):
+        self.group_size = max(1, group_size)
+        self.prefix = prefix
+        self.groups = {}
+        self.assignments = {}
+        self._open = {}
+        self._next_id = 1
+        self._tiebreak = itertools.count()
+
+    def fit(self, registrants):
+        # Bucket by subject then topic and deal the buckets round-robin into
+        # ceil(n / size) groups. Each topic is spread as evenly as possible,
+        # so no group holds more than ceil(count / groups) of one topic.
+        by_subject = {}
+        for registrant in registrants:
+            if registrant.email in self.assignments:
+                continue
+            by_subject.setdefault(registrant.subject, {}).setdefault(registrant.topic, []).append(registrant)
+        for subject, buckets in by_subject.items():
+            total = sum(len(bucket) for bucket in buckets.values())
+            groups = [self._new_group(subject) for _ in range(math.ceil(total / self.group_size))]
+            ordered = sorted(buckets.values(), key=len, reverse=True)
+            for i, registrant in enumerate(itertools.chain.from_iterable(ordered)):
+                self._assign(groups[i % len(groups)], registrant)
+            for group in groups:
+                self._reopen(group)
+        return self
+
+    def add(self, registrant):
+        # Late registrants join the open group of their subject that lacks
+        # their topic the most, looking only at the emptiest few groups.
+        if registrant.email in self.assignments:
+            return self.assignments[registrant.email]
+        heap = self._open.setdefault(registrant.subject, [])
+        candidates = [heapq.heappop(heap) for _ in range(min(MATCH_CANDIDATES, len(heap)))]
+        if candidates:
+            best = min(candidates, key=lambda item: (self.groups[item[2]].topic_counts[registrant.topic], item[0], item[1]))
+            for item in candidates:
+                if item is not best:
+                    heapq.heappush(heap, item)
+            group = self.groups[best[2]]
+        else:
+            group = self._new_group(registrant.subject)
+        self._assign(group, registrant)
+        self._reopen(group)
+        return group.group_id
+
+    def load_groups(self, groups_df):
+        for row in zip(
+            _column(groups_df, "group_id"),
+            _column(groups_df, "subject"),
+            _column(groups_df, "member_names"),
+            _column(groups_df, "topics"),
+            _column(groups_df, "member_emails"),
+        ):
+            group_id, subject, names, topics, emails = (_cell(value) for value in row)
+            if not group_id or group_id in self.groups:
+                continue
+            group = self.groups[group_id] = Group(group_id, subject)
+            names, topics, emails = names.split(","), topics.split(","), emails.split(",")
+            for i, name in enumerate(names):
+                name = name.strip()
+                if not name:
+                    continue
+                email = emails[i].strip().lower() if i < len(emails) else ""
+                topic = topics[i].strip() if i < len(topics) else ""
+                self._assign(group, Registrant(email, name, subject, topic))
+            self._reopen(group)
+            match = re.fullmatch(re.escape(self.prefix) + r"(\d+)", group_id)
+            if match:
+                self._next_id = max(self._next_id, int(match.group(1)) + 1)
+        return self
+
+    def groups_frame(self):
+        rows = []
+        for group in self.groups.values():
+            rows.append({
+                "group_id": group.group_id,
+                "subject": group.subject,
+                "member_names": ", ".join(member.name for member in group.members),
+                "topics": ", ".join(member.topic for member in group.members),
+                "member_emails": ", ".join(member.email for member in group.members),
+            })
+        return pd.DataFrame(rows, columns=["group_id", "subject", "member_names", "topics", "member_emails"])
+
+    def assignments_frame(self):
+        return pd.DataFrame(list(self.assignments.items()), columns=["email", "group_id"])
+
+    def _new_group(self, subject):
+        group_id = f"{self.prefix}{self._next_id:03d}"
+        self._next_id += 1
+        group = self.groups[group_id] = Group(group_id, subject)
+        return group
+
+    def _assign(self, group, registrant):
+        group.add(registrant)
+        if registrant.email:
+            self.assignments[registrant.email] = group.group_id
+
+    def _reopen(self, group):
+        if len(group.members) < self.group_size:
+            heap = self._open.setdefault(group.subject, [])
+            heapq.heappush(heap, (len(group.members), next(self._tiebreak), group.group_id))
+
+
+def match_students(students_df, group_size=MATCH_GROUP_SIZE, existing_groups_df=None, subject_col="subject", topic_col="topic"):
+    matcher = Matcher(group_size)
+    if existing_groups_df is None or existing_groups_df.empty:
+        matcher.fit(read_registrants(students_df, subject_col, topic_col))
+    else:
+        matcher.load_groups(existing_groups_df)
+        if "group_id" in students_df.columns:
+            unassigned = students_df["group_id"].isna() | (students_df["group_id"].astype(str).str.strip() == "")
+            students_df = students_df[unassigned]
+        for registrant in read_registrants(students_df, subject_col, topic_col):
+            matcher.add(registrant)
+    return matcher
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Group students by complementary topics")
+    parser.add_argument("students", help="Students CSV file or sheet export URL")
+    parser.add_argument("--size", type=int, default=MATCH_GROUP_SIZE, help="target group size")
+    parser.add_argument("--existing", help="existing Groups CSV; only unassigned students are added")
+    parser.add_argument("--out", default="groups.csv", help="where to write the Groups table")
+    parser.add_argument("--assignments", help="optional email,group_id CSV for the Students sheet")
+    parser.add_argument("--subject-col", default="subject")
+    parser.add_argument("--topic-col", default="topic")
+    args = parser.parse_args()
+
+    students_df = pd.read_csv(args.students)
+    existing_df = pd.read_csv(args.existing) if args.existing else None
+    matcher = match_students(students_df, args.size, existing_df, args.subject_col, args.topic_col)
+    matcher.groups_frame().to_csv(args.out, index=False)
+    if args.assignments:
+        matcher.assignments_frame().to_csv(args.assignments, index=False)
+    print(f"✅ Matched {len(matcher.assignments)} students into {len(matcher.groups)} groups → {args.out}")
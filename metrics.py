@@ -0,0 +1,218 @@
+import bisect
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+
+# ============================================
+# 📊 METRICS
+# Counters • latency histograms • Prometheus text • sampling profiler
+# ============================================
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "").lower() in ("1", "true", "yes")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+
+def format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def lines(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{format_labels(self.labels, key)} {format_value(value)}" for key, value in values]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (+Inf last), then sum
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[position] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def timed(self, **labels):
+        # Generator handlers are timed until their last yield
+        def decorate(fn):
+            if inspect.isgeneratorfunction(fn):
+                @functools.wraps(fn)
+                def wrapper(*args, **kwargs):
+                    with self.time(**labels):
+                        yield from fn(*args, **kwargs)
+            else:
+                @functools.wraps(fn)
+                def wrapper(*args, **kwargs):
+                    with self.time(**labels):
+                        return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def lines(self):
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        lines = []
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                labels = format_labels(self.labels + ("le",), key + (format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(values[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def collector(self, collect):
+        # collect() -> [(name, kind, help, [(labels_dict, value), ...]), ...],
+        # for values read from elsewhere at scrape time (cache stats, sessions)
+        with self._lock:
+            self._collectors.append(collect)
+        return collect
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.lines())
+        for collect in collectors:
+            for name, kind, help, samples in collect():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{format_labels(tuple(labels), tuple(labels.values()))} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _add(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+
+registry = Registry()
+
+
+class SamplingProfiler:
+    # Samples every thread's stack every `interval` seconds and counts
+    # folded stacks ("outer;inner;leaf count"), ready for flamegraph.pl
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks = StackCounter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+
+profile_lock = threading.Lock()
+
+
+def profile(seconds, interval=PROFILE_INTERVAL):
+    # One profile at a time; sampling every thread is not free
+    seconds = min(max(seconds, interval), PROFILE_MAX_SECONDS)
+    if not profile_lock.acquire(blocking=False):
+        return None
+    try:
+        profiler = SamplingProfiler(interval).start()
+        time.sleep(seconds)
+        return profiler.stop().folded()
+    finally:
+        profile_lock.release()
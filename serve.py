@@ -0,0 +1,114 @@
+import os
+import subprocess
+import sys
+from contextlib import asynccontextmanager
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+import app as synchrony
+import metrics
+from api import create_api
+from snapshot import SYNCHRONY_SNAPSHOT
+from startup import startup
+from store import SYNCHRONY_DB
+
+# ============================================
+# 🚀 PRODUCTION SERVING
+# ASGI mount • uvicorn workers • health checks
+# ============================================
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "7860"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+
+def create_app():
+    # Called in each worker (uvicorn's factory), never in the supervising process.
+    # Sheets download in the background while gradio is imported and the UI is built
+    synchrony.start_background()
+
+    @asynccontextmanager
+    async def lifespan(api):
+        startup.complete("serving")
+        yield
+
+    api = FastAPI(lifespan=lifespan)
+
+    @api.get("/healthz")
+    def healthz():
+        return {"status": "ok"}
+
+    @api.get("/readyz")
+    def readyz():
+        status = 200 if synchrony.readiness["ready"] else 503
+        body = dict(
+            synchrony.readiness,
+            sessions=len(synchrony.sessions),
+            circuits=synchrony.sheet_cache.circuits(),
+            startup=startup.summary()
+        )
+        return JSONResponse(body, status_code=status)
+
+    @api.get("/metrics")
+    def prometheus_metrics():
+        return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+    @api.get("/debug/profile")
+    def debug_profile(seconds: float = 10.0):
+        # Folded stacks of every thread, e.g. for flamegraph.pl
+        if not metrics.PROFILER_ENABLED:
+            return PlainTextResponse("profiler disabled (set PROFILER_ENABLED=1)\n", status_code=404)
+        folded = metrics.profile(seconds)
+        if folded is None:
+            return PlainTextResponse("a profile is already running\n", status_code=409)
+        return PlainTextResponse(folded)
+
+    # Mounted before gradio, which takes every path under "/"
+    api.mount("/api/v1", create_api())
+
+    demo = synchrony.build_demo()
+    return synchrony.gr.mount_gradio_app(api, demo, path="")
+
+
+def __getattr__(name):
+    # `uvicorn serve:app` builds the app on first access, in the worker
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if __name__ == "__main__":
+    # Gradio keeps each session's queue in the process that created it, and
+    # uvicorn's workers share one socket, so a session's requests would land on
+    # different workers. Several workers are therefore separate single-worker
+    # processes on PORT, PORT+1, ...; put them behind a load balancer with
+    # sticky sessions (and CHAT_BACKEND=redis).
+    # With SYNCHRONY_SNAPSHOT set, one refresher fetches the sheets for all of
+    # them; with SYNCHRONY_DB and several workers, one sync process fills the database
+    here = os.path.dirname(os.path.abspath(__file__))
+    helpers = []
+    if SYNCHRONY_SNAPSHOT:
+        helpers.append(subprocess.Popen([sys.executable, os.path.join(here, "snapshot.py"), SYNCHRONY_SNAPSHOT]))
+    elif SYNCHRONY_DB and WEB_CONCURRENCY > 1:
+        os.environ["SYNC_EXTERNAL"] = "1"
+        helpers.append(subprocess.Popen([sys.executable, os.path.join(here, "store.py"), SYNCHRONY_DB]))
+    try:
+        if WEB_CONCURRENCY == 1:
+            uvicorn.run(create_app(), host=HOST, port=PORT)
+        else:
+            # uvicorn's CLI takes its --workers default from WEB_CONCURRENCY too
+            command = [sys.executable, "-m", "uvicorn", "serve:create_app", "--factory", "--workers", "1", "--host", HOST]
+            workers = [
+                subprocess.Popen(command + ["--port", str(PORT + i)], cwd=here)
+                for i in range(WEB_CONCURRENCY)
+            ]
+            helpers.extend(workers)
+            print(f"🚀 {WEB_CONCURRENCY} workers on ports {PORT}-{PORT + WEB_CONCURRENCY - 1}")
+            for worker in workers:
+                worker.wait()
+    finally:
+        for helper in helpers:
+            helper.terminate()
@@ -0,0 +1,430 @@
+import csv
+import importlib.util
+import io
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import registry
+from startup import lazy_import
+
+pd = lazy_import("pandas")
+
+# ============================================
+# 🗂️ SHARED SHEET CACHE
+# TTL • stale-while-revalidate • conditional GETs • local CSV files
+# ============================================
+
+SHEET_CACHE_TTL = float(os.getenv("SHEET_CACHE_TTL", "60"))
+SHEET_CACHE_STALE_TTL = float(os.getenv("SHEET_CACHE_STALE_TTL", "600"))
+SHEET_FETCH_TIMEOUT = float(os.getenv("SHEET_FETCH_TIMEOUT", "15"))
+SHEET_CONNECT_TIMEOUT = float(os.getenv("SHEET_CONNECT_TIMEOUT", "5"))
+# Downloads are single-flight per URL, so a handful of sheets plus the
+# sync job is the most ever in flight at once
+SHEET_POOL_SIZE = int(os.getenv("SHEET_POOL_SIZE", "8"))
+SHEET_BREAKER_FAILURES = int(os.getenv("SHEET_BREAKER_FAILURES", "3"))
+SHEET_BREAKER_COOLDOWN = float(os.getenv("SHEET_BREAKER_COOLDOWN", "30"))
+SHEET_NEGATIVE_TTL = float(os.getenv("SHEET_NEGATIVE_TTL", "5"))
+# pyarrow parses in parallel threads; the C engine is the fallback
+SHEET_CSV_ENGINE = os.getenv("SHEET_CSV_ENGINE") or ("pyarrow" if importlib.util.find_spec("pyarrow") else "c")
+
+fetch_seconds = registry.histogram(
+    "synchrony_sheet_fetch_seconds", "Time spent fetching a sheet from upstream", ["sheet", "outcome"]
+)
+fetch_bytes = registry.counter("synchrony_sheet_bytes_total", "Bytes downloaded per sheet", ["sheet"])
+parse_seconds = registry.histogram("synchrony_sheet_parse_seconds", "Time spent parsing a sheet's CSV", ["sheet"])
+schema_drift = registry.counter(
+    "synchrony_sheet_schema_drift_total", "Parses where a declared column was missing from the sheet", ["sheet", "column"]
+)
+
+
+class SheetSchema:
+    # The columns consumers read; every other column is skipped at parse
+    # time. Repeated values (group ids, subjects) become categoricals.
+    # Optional columns are read when present and not reported when missing.
+    def __init__(self, columns, categories=(), optional=()):
+        self.columns = tuple(columns)
+        self.optional = tuple(optional)
+        self.categories = frozenset(categories)
+        self.positions = set()
+        self._missing = None
+
+    def keep_position(self, position):
+        # Columns addressed by letter (e.g. the form Timestamp) are kept too
+        self.positions.add(position)
+
+    def usecols(self, header, sheet_name):
+        keep = [
+            name for i, name in enumerate(header)
+            if name in self.columns or name in self.optional or i in self.positions
+        ]
+        missing = tuple(name for name in self.columns if name not in header)
+        for name in missing:
+            schema_drift.inc(sheet=sheet_name, column=name)
+        if missing != self._missing:
+            if missing:
+                print(f"⚠️ {sheet_name} sheet has no {', '.join(missing)} column; reading the rest")
+            self._missing = missing
+        return keep
+
+
+SHEET_SCHEMAS = {
+    "Students": SheetSchema(["email", "name", "group_id"], categories=["group_id"]),
+    "Groups": SheetSchema(["group_id", "subject", "member_names", "topics"], categories=["subject"], optional=["member_emails"]),
+    "Challenges": SheetSchema(
+        ["session_id", "group_id", "challenge_number", "description", "topics_involved", "hints_json"],
+        categories=["session_id", "group_id", "topics_involved"]
+    ),
+}
+
+
+def make_http_session(pool_size=SHEET_POOL_SIZE):
+    # One keep-alive pool for every sheet fetch, so repeat downloads skip
+    # the TCP and TLS handshakes
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip"
+    return session
+
+
+http = make_http_session()
+
+
+class _Rewound(io.RawIOBase):
+    # The header line, already read to pick columns, followed by the rest of the body
+    def __init__(self, head, rest):
+        self.head = head
+        self.rest = rest
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.head:
+            n = min(len(buffer), len(self.head))
+            buffer[:n] = self.head[:n]
+            self.head = self.head[n:]
+            return n
+        data = self.rest.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def csv_header(first_line):
+    return next(csv.reader([first_line.decode("utf-8-sig")]), [])
+
+
+def parse_csv(stream, sheet_name=None):
+    # stream: a binary file object, e.g. a response body; it is parsed as it
+    # arrives instead of being read into memory first
+    schema = SHEET_SCHEMAS.get(sheet_name)
+    with parse_seconds.time(sheet=sheet_name or "Unknown"):
+        first_line = stream.readline()
+        body = io.BufferedReader(_Rewound(first_line, stream))
+        if schema is None:
+            return pd.read_csv(body, engine=SHEET_CSV_ENGINE)
+        header = csv_header(first_line)
+        keep = schema.usecols(header, sheet_name)
+        df = pd.read_csv(
+            body,
+            usecols=keep,
+            dtype={name: "category" for name in keep if name in schema.categories},
+            engine=SHEET_CSV_ENGINE
+        )
+    # Positions in the original sheet, for columns addressed by letter
+    df.attrs["source_columns"] = header
+    return df
+
+
+def open_url(url, headers=None, timeout=SHEET_FETCH_TIMEOUT):
+    # The read timeout bounds every wait for the next chunk, so a stalled
+    # upstream frees the worker instead of holding it
+    response = http.get(url, headers=headers, timeout=(SHEET_CONNECT_TIMEOUT, timeout), stream=True)
+    response.raw.decode_content = True
+    return response
+
+
+def read_body(response, sheet_name):
+    df = parse_csv(response.raw, sheet_name)
+    # Bytes off the wire (compressed when the server used gzip)
+    fetch_bytes.inc(response.raw.tell(), sheet=sheet_name or "Unknown")
+    return df
+
+
+def read_csv_url(url, sheet_name=None, timeout=SHEET_FETCH_TIMEOUT, headers=None):
+    with open_url(url, headers, timeout) as response:
+        response.raise_for_status()
+        return read_body(response, sheet_name)
+
+
+class SheetUnavailable(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    # closed: fetches go through, but for negative_ttl after a failure
+    # callers get the failure back without a new attempt.
+    # open (after `failures` failures in a row): no fetches for `cooldown`.
+    # half-open: one probe is let through; success closes, failure reopens.
+    CLOSED, HALF_OPEN, OPEN = "closed", "half-open", "open"
+
+    def __init__(self, sheet_name, failures=SHEET_BREAKER_FAILURES, cooldown=SHEET_BREAKER_COOLDOWN, negative_ttl=SHEET_NEGATIVE_TTL):
+        self.sheet_name = sheet_name
+        self.failures = failures
+        self.cooldown = cooldown
+        self.negative_ttl = negative_ttl
+        self.state = self.CLOSED
+        self.consecutive = 0
+        self.retry_at = 0.0
+        self.last_error = None
+
+    def allow(self, now):
+        # Called under the cache lock
+        if self.state == self.HALF_OPEN:
+            return False
+        if now < self.retry_at:
+            return False
+        if self.state == self.OPEN:
+            self.state = self.HALF_OPEN
+        return True
+
+    def success(self):
+        self.state = self.CLOSED
+        self.consecutive = 0
+        self.retry_at = 0.0
+        self.last_error = None
+
+    def failure(self, error, now):
+        self.consecutive += 1
+        self.last_error = error
+        if self.state == self.HALF_OPEN or self.consecutive >= self.failures:
+            self.state = self.OPEN
+            self.retry_at = now + self.cooldown
+        else:
+            self.retry_at = now + self.negative_ttl
+
+    def unavailable(self):
+        return SheetUnavailable(f"{self.sheet_name} sheet unavailable (circuit {self.state}): {self.last_error}")
+
+
+class _Entry:
+    __slots__ = ("df", "etag", "last_modified", "fetched_at", "version", "derived", "build_lock")
+
+    def __init__(self, df, etag, last_modified, fetched_at, version):
+        self.df = df
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.version = version
+        self.derived = {}
+        self.build_lock = threading.Lock()
+
+
+class _Flight:
+    __slots__ = ("done", "df", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.df = None
+        self.error = None
+
+
+class SheetCache:
+    def __init__(self, ttl=SHEET_CACHE_TTL, stale_ttl=SHEET_CACHE_STALE_TTL, timeout=SHEET_FETCH_TIMEOUT):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+        self._entries = {}
+        self._flights = {}
+        self._breakers = {}
+        self._versions = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+            "not_modified": 0,
+            "errors": 0,
+            "short_circuits": 0,
+            "builds": 0,
+        }
+
+    def get(self, url, sheet_name="Unknown"):
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(url)
+            breaker = self._breaker(url, sheet_name)
+            if entry is not None:
+                age = now - entry.fetched_at
+                if age < self.ttl:
+                    self._counters["hits"] += 1
+                    return entry.df
+                if age < self.ttl + self.stale_ttl:
+                    # Serve the stale copy now, revalidate in the background
+                    self._counters["stale_hits"] += 1
+                    if url not in self._flights and breaker.allow(now):
+                        flight = self._flights[url] = _Flight()
+                        threading.Thread(target=self._run, args=(url, sheet_name, flight), daemon=True).start()
+                    return entry.df
+            flight = self._flights.get(url)
+            leader = flight is None
+            if leader and not breaker.allow(now):
+                # Upstream is failing: answer at once with the last good
+                # copy (however old), or with the failure
+                self._counters["short_circuits"] += 1
+                if entry is not None:
+                    return entry.df
+                raise breaker.unavailable()
+            if leader:
+                self._counters["misses"] += 1
+                flight = self._flights[url] = _Flight()
+            else:
+                self._counters["coalesced"] += 1
+        if leader:
+            self._run(url, sheet_name, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.df
+
+    def derive(self, url, sheet_name, build):
+        # Indices built from a sheet live on its cache entry, so they are
+        # rebuilt exactly once per refresh and survive 304 revalidations.
+        df = self.get(url, sheet_name)
+        with self._lock:
+            entry = self._entries.get(url)
+        if entry is None or entry.df is not df:
+            return build(df)
+        with entry.build_lock:
+            value = entry.derived.get(build)
+            if value is None:
+                value = entry.derived[build] = build(df)
+                with self._lock:
+                    self._counters["builds"] += 1
+        return value
+
+    def version(self, url):
+        with self._lock:
+            entry = self._entries.get(url)
+            return entry.version if entry is not None else 0
+
+    def circuits(self):
+        with self._lock:
+            return {breaker.sheet_name: breaker.state for breaker in self._breakers.values()}
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_ratio"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def invalidate(self, url=None):
+        with self._lock:
+            if url is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(url, None)
+
+    def _run(self, url, sheet_name, flight):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            flight.df, outcome = self._fetch(url, sheet_name)
+            with self._lock:
+                self._breaker(url, sheet_name).success()
+        except Exception as e:
+            with self._lock:
+                self._counters["errors"] += 1
+                self._breaker(url, sheet_name).failure(e, time.monotonic())
+                entry = self._entries.get(url)
+            if entry is None:
+                flight.error = e
+            else:
+                print(f"⚠️ Refresh of {sheet_name} failed, serving cached copy: {e}")
+                flight.df = entry.df
+        finally:
+            fetch_seconds.observe(time.perf_counter() - started, sheet=sheet_name, outcome=outcome)
+            with self._lock:
+                self._flights.pop(url, None)
+            flight.done.set()
+
+    def _breaker(self, url, sheet_name):
+        # Called under the cache lock
+        breaker = self._breakers.get(url)
+        if breaker is None:
+            breaker = self._breakers[url] = CircuitBreaker(sheet_name)
+        return breaker
+
+    def _fetch(self, url, sheet_name):
+        with self._lock:
+            entry = self._entries.get(url)
+        if url.startswith(("http://", "https://")):
+            df, etag, last_modified = self._download(url, sheet_name, entry)
+        else:
+            df, etag, last_modified = self._read_file(url, sheet_name, entry)
+        if df is None:
+            with self._lock:
+                entry.fetched_at = time.monotonic()
+                self._counters["not_modified"] += 1
+            return entry.df, "not_modified"
+        with self._lock:
+            self._versions += 1
+            self._entries[url] = _Entry(df, etag, last_modified, time.monotonic(), self._versions)
+            self._counters["refreshes"] += 1
+        print(f"✅ Loaded {len(df)} rows from {sheet_name}")
+        return df, "refreshed"
+
+    def _download(self, url, sheet_name, entry):
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        with open_url(url, headers, self.timeout) as response:
+            if response.status_code == 304 and entry is not None:
+                return None, entry.etag, entry.last_modified
+            response.raise_for_status()
+            df = read_body(response, sheet_name)
+            return df, response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+    def _read_file(self, path, sheet_name, entry):
+        # Local CSV exports use their mtime as the validator
+        mtime = str(os.stat(path).st_mtime_ns)
+        if entry is not None and entry.etag == mtime:
+            return None, entry.etag, None
+        with open(path, "rb") as f:
+            return parse_csv(f, sheet_name), mtime, None
+
+
+sheet_cache = SheetCache()
+
+
+CIRCUIT_LEVELS = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+
+
+@registry.collector
+def sheet_cache_metrics():
+    stats = sheet_cache.stats()
+    lookups = ("hits", "stale_hits", "misses", "coalesced")
+    return [
+        ("synchrony_sheet_cache_lookups_total", "counter", "Sheet cache lookups by result",
+         [({"result": result}, stats[result]) for result in lookups]),
+        ("synchrony_sheet_cache_hit_ratio", "gauge", "Share of sheet lookups served from cache",
+         [({}, stats["hit_ratio"])]),
+        ("synchrony_sheet_cache_events_total", "counter", "Sheet cache refreshes, revalidations, errors, short circuits and index builds",
+         [({"event": event}, stats[event]) for event in ("refreshes", "not_modified", "errors", "short_circuits", "builds")]),
+        ("synchrony_sheet_cache_entries", "gauge", "Sheets currently cached", [({}, stats["entries"])]),
+        ("synchrony_sheet_circuit_state", "gauge", "Circuit breaker state per sheet (0 closed, 1 half-open, 2 open)",
+         [({"sheet": sheet}, CIRCUIT_LEVELS[state]) for sheet, state in sorted(sheet_cache.circuits().items())]),
+    ]
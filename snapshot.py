@@ -0,0 +1,227 @@
+import argparse
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+from dashboard import view_payload
+
+# ============================================
+# 🧊 ROSTER SNAPSHOT
+# One refresher process • versioned read-only file • mmap'd by every worker
+# ============================================
+
+SYNCHRONY_SNAPSHOT = os.getenv("SYNCHRONY_SNAPSHOT", "")
+SNAPSHOT_INTERVAL = float(os.getenv("SNAPSHOT_INTERVAL", "60"))
+SNAPSHOT_CHECK_INTERVAL = float(os.getenv("SNAPSHOT_CHECK_INTERVAL", "2"))
+
+# File layout (little endian):
+#   header   magic, format, data version, written_at, table count
+#   tables   name, index offset, entry count
+#   records  one JSON [key, value] per entry
+#   indices  per table, (key hash, record offset, record length) sorted by hash
+MAGIC = b"SYNCSNAP"
+FORMAT = 1
+HEADER = struct.Struct("<8sIQdI")
+TABLE = struct.Struct("<16sQQ")
+ENTRY = struct.Struct("<QQI")
+
+
+def key_hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+def write_snapshot(path, tables, version):
+    # tables: {name: {key: JSON-able value}}. Written beside `path` and
+    # renamed over it, so readers see the old file or the new one, never a mix
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.seek(HEADER.size + TABLE.size * len(tables))
+        layout = []
+        for name, records in tables.items():
+            entries = []
+            for key, value in records.items():
+                record = json.dumps([key, value], ensure_ascii=False, separators=(",", ":")).encode()
+                entries.append((key_hash(key), f.tell(), len(record)))
+                f.write(record)
+            entries.sort()
+            index_offset = f.tell()
+            for entry in entries:
+                f.write(ENTRY.pack(*entry))
+            layout.append((name, index_offset, len(entries)))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, FORMAT, version, time.time(), len(tables)))
+        for name, index_offset, count in layout:
+            f.write(TABLE.pack(name.encode(), index_offset, count))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def status_path(path):
+    return f"{path}.status"
+
+
+def write_status(path, down):
+    # Rewritten after every check, changed or not, so workers can tell sheets
+    # that did not change from a refresher that is failing or has stopped
+    tmp = f"{status_path(path)}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"checked_at": time.time(), "down": sorted(down)}, f)
+    os.replace(tmp, status_path(path))
+
+
+def read_status(path):
+    # -> {"checked_at", "down"}, or None before the refresher's first check
+    try:
+        with open(status_path(path)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class _Hashes:
+    # The sorted hash column of one index, read straight from the map
+    def __init__(self, buffer, offset, count):
+        self.buffer = buffer
+        self.offset = offset
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return struct.unpack_from("<Q", self.buffer, self.offset + i * ENTRY.size)[0]
+
+
+class Snapshot:
+    # One mapped snapshot file; lookups decode only the matching record
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.stat = os.fstat(f.fileno())
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, fmt, self.version, self.written_at, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or fmt != FORMAT:
+            raise ValueError(f"{path} is not a format {FORMAT} Synchrony snapshot")
+        self.tables = {}
+        for i in range(count):
+            name, index_offset, entries = TABLE.unpack_from(self._map, HEADER.size + i * TABLE.size)
+            self.tables[name.rstrip(b"\0").decode()] = (index_offset, entries)
+
+    def count(self, table):
+        return self.tables.get(table, (0, 0))[1]
+
+    def keys(self, table):
+        # Decodes every record of the table; for building derived indices
+        index_offset, entries = self.tables.get(table, (0, 0))
+        for i in range(entries):
+            _, offset, length = ENTRY.unpack_from(self._map, index_offset + i * ENTRY.size)
+            yield json.loads(self._map[offset:offset + length])[0]
+
+    def get(self, table, key):
+        if key is None or table not in self.tables:
+            return None
+        index_offset, entries = self.tables[table]
+        wanted = key_hash(key)
+        i = bisect.bisect_left(_Hashes(self._map, index_offset, entries), wanted)
+        while i < entries:
+            found, offset, length = ENTRY.unpack_from(self._map, index_offset + i * ENTRY.size)
+            if found != wanted:
+                break
+            record_key, value = json.loads(self._map[offset:offset + length])
+            if record_key == key:
+                return value
+            i += 1
+        return None
+
+
+class SnapshotReader:
+    # Switches to a newer file once the refresher has renamed it into place;
+    # lookups already running keep the old map until they finish
+    def __init__(self, path, check_interval=SNAPSHOT_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self):
+        now = time.monotonic()
+        if self._snapshot is None or now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if self._snapshot is None or now - self._checked_at >= self.check_interval:
+                    self._checked_at = now
+                    self._reload()
+        if self._snapshot is None:
+            raise FileNotFoundError(f"no snapshot at {self.path} yet")
+        return self._snapshot
+
+    def _reload(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        old = self._snapshot
+        if old is not None and (stat.st_ino, stat.st_mtime_ns) == (old.stat.st_ino, old.stat.st_mtime_ns):
+            return
+        self._snapshot = Snapshot(self.path)
+        if old is not None:
+            print(f"🧊 Switched to roster snapshot v{self._snapshot.version}")
+
+
+def snapshot_tables(app):
+    # Raises if a sheet has never been fetched; a failing refresh keeps the
+    # last good copy in the sheet cache, so the snapshot is left unchanged
+    students = app.sheet_cache.derive(app.STUDENTS_URL, "Students", app.build_student_index)
+    groups = app.sheet_cache.derive(app.GROUPS_URL, "Groups", app.group_records)
+    challenges = app.sheet_cache.derive(app.CHALLENGES_URL, "Challenges", app.build_challenge_index)
+    return {
+        # The instructor dashboard's view, so workers never fetch the sheets
+        "cohort": {"view": view_payload(*app.build_cohort_view())},
+        "students": {email: list(student) for email, student in students.items()},
+        "groups": {group_id: [subject, [list(member) for member in team]] for group_id, (subject, team) in groups.items()},
+        "challenges": {
+            key: [dict(challenge, hints=list(challenge["hints"])) for challenge in rows]
+            for key, rows in challenges.items()
+        },
+    }
+
+
+def refresh(path, interval=SNAPSHOT_INTERVAL, once=False):
+    import app
+
+    versions = None
+    version = Snapshot(path).version if os.path.exists(path) else 0
+    while True:
+        try:
+            tables = snapshot_tables(app)
+            current = tuple(app.sheet_cache.version(url) for url in (app.STUDENTS_URL, app.GROUPS_URL, app.CHALLENGES_URL))
+            if current != versions:
+                version += 1
+                write_snapshot(path, tables, version)
+                versions = current
+                print(
+                    f"🧊 Wrote roster snapshot v{version}: {len(tables['students'])} students, "
+                    f"{len(tables['groups'])} groups, {len(tables['challenges'])} challenge sets"
+                )
+            down = [sheet for sheet, state in app.sheet_cache.circuits().items() if state != "closed"]
+        except Exception as e:
+            print(f"⚠️ Snapshot refresh failed, keeping v{version}: {e}")
+            down = ["Students", "Groups", "Challenges"]
+        write_status(path, down)
+        if once:
+            return version
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch the sheets and keep a shared roster snapshot up to date")
+    parser.add_argument("path", nargs="?", default=SYNCHRONY_SNAPSHOT or "roster.snap", help="snapshot file to write")
+    parser.add_argument("--interval", type=float, default=SNAPSHOT_INTERVAL, help="seconds between sheet checks")
+    parser.add_argument("--once", action="store_true", help="write one snapshot and exit")
+    args = parser.parse_args()
+    refresh(args.path, args.interval, args.once)
@@ -0,0 +1,79 @@
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+# ============================================
+# ⏱️ STARTUP
+# Lazy imports • phase timings for cold starts
+# ============================================
+
+
+class LazyModule:
+    # Stands in for a module and imports it on first attribute access
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    return LazyModule(name)
+
+
+class StartupReport:
+    # Steps run on different threads (serving, warm-up); the report is
+    # printed once the last of them completes
+    def __init__(self, steps=("serving", "warm-up")):
+        self.started = time.perf_counter()
+        self.phases = []
+        self.pending = set(steps)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, started, time.perf_counter() - started)
+
+    def mark(self, name):
+        self._record(name, time.perf_counter(), None)
+
+    def complete(self, step):
+        self.mark(f"{step} done")
+        with self._lock:
+            if step not in self.pending:
+                return
+            self.pending.discard(step)
+            finished = not self.pending
+        if finished:
+            self.print_report()
+
+    def summary(self):
+        with self._lock:
+            phases = sorted(self.phases, key=lambda phase: phase[1])
+        return [
+            {"phase": name, "at_s": round(at, 3), "seconds": None if seconds is None else round(seconds, 3)}
+            for name, at, seconds in phases
+        ]
+
+    def print_report(self):
+        print("\n⏱️ Startup report")
+        for phase in self.summary():
+            took = "" if phase["seconds"] is None else f"{phase['seconds']:>8.2f}s"
+            print(f"   {phase['phase']:<22}at {phase['at_s']:>7.2f}s {took}")
+        print()
+
+    def _record(self, name, started, seconds):
+        with self._lock:
+            self.phases.append((name, started - self.started, seconds))
+
+
+startup = StartupReport()
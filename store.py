@@ -0,0 +1,355 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# ============================================
+# 🗄️ LOCAL STORE
+# SQLite (WAL) system of record • sheets are a sync source
+# ============================================
+
+SYNCHRONY_DB = os.getenv("SYNCHRONY_DB", "")
+SYNC_INTERVAL = float(os.getenv("SYNC_INTERVAL", "60"))
+# Set when a dedicated `python store.py` process syncs for every worker
+SYNC_EXTERNAL = os.getenv("SYNC_EXTERNAL", "") not in ("", "0")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    email TEXT PRIMARY KEY,
+    name TEXT,
+    group_id TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS students_group_id ON students (group_id);
+
+CREATE TABLE IF NOT EXISTS groups (
+    group_id TEXT PRIMARY KEY,
+    subject TEXT
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS members (
+    group_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    topic TEXT,
+    email TEXT,
+    PRIMARY KEY (group_id, position)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS challenges (
+    lookup_key TEXT NOT NULL,
+    challenge_number INTEGER NOT NULL,
+    description TEXT,
+    topics_involved TEXT,
+    hints_json TEXT,
+    PRIMARY KEY (lookup_key, challenge_number)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS generated_challenges (
+    group_id TEXT PRIMARY KEY,
+    generated_at REAL,
+    challenges_json TEXT
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS cohort_view (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    built_at REAL,
+    view_json TEXT
+);
+
+CREATE TABLE IF NOT EXISTS sheet_health (
+    sheet TEXT PRIMARY KEY,
+    healthy INTEGER,
+    checked_at REAL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    source TEXT PRIMARY KEY,
+    version INTEGER,
+    rows INTEGER,
+    inserted INTEGER,
+    updated INTEGER,
+    deleted INTEGER,
+    synced_at REAL
+) WITHOUT ROWID;
+"""
+
+
+class Store:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._write_lock:
+            conn = self._conn()
+            conn.executescript(SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(sync_state)")}
+            if "inserted" not in columns:
+                # sync_state predates per-sync change counts
+                conn.execute("DROP TABLE sync_state")
+                conn.executescript(SCHEMA)
+            if "email" not in {row[1] for row in conn.execute("PRAGMA table_info(members)")}:
+                # members predates member emails; the next sync fills them in
+                conn.execute("ALTER TABLE members ADD COLUMN email TEXT")
+            if "position" in {row[1] for row in conn.execute("PRAGMA table_info(challenges)")}:
+                # challenges were keyed by sheet position, which a new-rows-only
+                # sync cannot know; the next sync refills the table
+                conn.execute("DROP TABLE challenges")
+                conn.executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    # ---------- reads (request handlers) ----------
+
+    def find_student(self, email):
+        return self._conn().execute(
+            "SELECT email, name, group_id FROM students WHERE email = ?", (email,)
+        ).fetchone()
+
+    def group_members(self, group_id):
+        return self._conn().execute(
+            "SELECT name, topic, email FROM members WHERE group_id = ? ORDER BY position", (group_id,)
+        ).fetchall()
+
+    def group_subject(self, group_id):
+        row = self._conn().execute("SELECT subject FROM groups WHERE group_id = ?", (group_id,)).fetchone()
+        return row[0] if row else None
+
+    def challenges(self, lookup_key):
+        rows = self._conn().execute(
+            "SELECT challenge_number, description, topics_involved, hints_json FROM challenges "
+            "WHERE lookup_key = ? ORDER BY challenge_number",
+            (lookup_key,),
+        ).fetchall()
+        return [
+            {
+                "challenge_number": number,
+                "description": description,
+                "topics_involved": topics_involved,
+                "hints": tuple(json.loads(hints_json)),
+            }
+            for number, description, topics_involved, hints_json in rows
+        ]
+
+    def sync_state(self):
+        rows = self._conn().execute(
+            "SELECT source, version, rows, inserted, updated, deleted, synced_at FROM sync_state"
+        ).fetchall()
+        return {
+            source: {"version": version, "rows": count, "inserted": inserted, "updated": updated, "deleted": deleted, "synced_at": synced_at}
+            for source, version, count, inserted, updated, deleted, synced_at in rows
+        }
+
+    def generated_challenges(self, group_id):
+        # -> (generated_at, challenges) or None; kept apart from the synced
+        # challenges, which a full pass would delete as missing from the sheet
+        row = self._conn().execute(
+            "SELECT generated_at, challenges_json FROM generated_challenges WHERE group_id = ?", (group_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        generated_at, challenges_json = row
+        return generated_at, tuple(dict(challenge, hints=tuple(challenge["hints"])) for challenge in json.loads(challenges_json))
+
+    def sheet_health(self):
+        # -> {sheet: (healthy, checked_at)} as last seen by the sync job
+        rows = self._conn().execute("SELECT sheet, healthy, checked_at FROM sheet_health").fetchall()
+        return {sheet: (bool(healthy), checked_at) for sheet, healthy, checked_at in rows}
+
+    def cohort_version(self):
+        row = self._conn().execute("SELECT built_at FROM cohort_view WHERE id = 1").fetchone()
+        return row[0] if row else None
+
+    def cohort_view(self):
+        row = self._conn().execute("SELECT view_json FROM cohort_view WHERE id = 1").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def is_empty(self):
+        return self._conn().execute("SELECT 1 FROM students LIMIT 1").fetchone() is None
+
+    # ---------- current contents (seed the sync fingerprints) ----------
+
+    def load_students(self):
+        rows = self._conn().execute("SELECT email, name, group_id FROM students")
+        return {row[0]: row for row in rows}
+
+    def load_groups(self):
+        members = {}
+        for group_id, name, topic, email in self._conn().execute(
+            "SELECT group_id, name, topic, email FROM members ORDER BY group_id, position"
+        ):
+            members.setdefault(group_id, []).append((name, topic, email))
+        return {
+            group_id: (subject, tuple(members.get(group_id, ())))
+            for group_id, subject in self._conn().execute("SELECT group_id, subject FROM groups")
+        }
+
+    def load_challenges(self):
+        rows = self._conn().execute(
+            "SELECT lookup_key, challenge_number, description, topics_involved, hints_json FROM challenges"
+        )
+        return {
+            (lookup_key, number): {
+                "challenge_number": number,
+                "description": description,
+                "topics_involved": topics_involved,
+                "hints": tuple(json.loads(hints_json)),
+            }
+            for lookup_key, number, description, topics_involved, hints_json in rows
+        }
+
+    # ---------- writes (sync job) ----------
+
+    def apply_students(self, upserts, deletes):
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM students WHERE email = ?", [(email,) for email in deletes])
+            conn.executemany(
+                "INSERT OR REPLACE INTO students VALUES (?, ?, ?)",
+                [(email, student[1], student[2]) for email, student in upserts.items()],
+            )
+
+    def apply_groups(self, upserts, deletes):
+        # upserts: {group_id: (subject, members)}
+        changed = [(group_id,) for group_id in list(deletes) + list(upserts)]
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM groups WHERE group_id = ?", changed)
+            conn.executemany("DELETE FROM members WHERE group_id = ?", changed)
+            conn.executemany(
+                "INSERT INTO groups VALUES (?, ?)",
+                [(group_id, subject) for group_id, (subject, _) in upserts.items()],
+            )
+            conn.executemany(
+                "INSERT INTO members (group_id, position, name, topic, email) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (group_id, position, member[0], member[1], member[2])
+                    for group_id, (_, members) in upserts.items()
+                    for position, member in enumerate(members)
+                ],
+            )
+
+    def apply_challenges(self, upserts, deletes):
+        # upserts: {(lookup_key, challenge_number): challenge}
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM challenges WHERE lookup_key = ? AND challenge_number = ?", list(deletes))
+            conn.executemany(
+                "INSERT OR REPLACE INTO challenges VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        lookup_key,
+                        number,
+                        challenge["description"],
+                        challenge["topics_involved"],
+                        json.dumps(list(challenge["hints"])),
+                    )
+                    for (lookup_key, number), challenge in upserts.items()
+                ],
+            )
+
+    def save_cohort_view(self, view):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cohort_view VALUES (1, ?, ?)",
+                (time.time(), json.dumps(view, ensure_ascii=False, separators=(",", ":"))),
+            )
+
+    def save_generated_challenges(self, group_id, challenges):
+        payload = [dict(challenge, hints=list(challenge["hints"])) for challenge in challenges]
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO generated_challenges VALUES (?, ?, ?)",
+                (group_id, time.time(), json.dumps(payload, ensure_ascii=False, separators=(",", ":"))),
+            )
+
+    def save_sheet_health(self, healthy):
+        # healthy: {sheet: bool}
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sheet_health VALUES (?, ?, ?)",
+                [(sheet, int(ok), now) for sheet, ok in healthy.items()],
+            )
+
+    def mark_synced(self, source, version, rows, inserted, updated, deleted):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (source, version, rows, inserted, updated, deleted, time.time()),
+            )
+
+    def _transaction(self):
+        return _Transaction(self._conn(), self._write_lock)
+
+
+class _Transaction:
+    def __init__(self, conn, lock):
+        self.conn = conn
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.lock.release()
+        return False
+
+
+class SyncJob:
+    # tasks: {source_name: callable(store)}
+    def __init__(self, store, tasks, interval=SYNC_INTERVAL):
+        self.store = store
+        self.tasks = tasks
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        for source, task in self.tasks.items():
+            try:
+                task(self.store)
+            except Exception as e:
+                print(f"⚠️ Sync of {source} failed, keeping local copy: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        # Blocks; for a dedicated sync process
+        self._loop()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import app
+
+    parser = argparse.ArgumentParser(description="Keep the local database in sync with the sheets for every worker")
+    parser.add_argument("path", nargs="?", default=SYNCHRONY_DB or "synchrony.db", help="SQLite database to write")
+    parser.add_argument("--interval", type=float, default=SYNC_INTERVAL, help="seconds between syncs")
+    parser.add_argument("--once", action="store_true", help="sync once and exit")
+    args = parser.parse_args()
+    job = app.make_sync_job(Store(args.path), args.interval)
+    job.run_once() if args.once else job.run()
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import string
+from urllib.parse import quote
+
+from sheets import SHEET_SCHEMAS, read_csv_url, sheet_cache
+from startup import lazy_import
+
+pd = lazy_import("pandas")
+
+# ============================================
+# 🔄 DIFFERENTIAL SHEET SYNC
+# Row fingerprints • only changed rows are written
+# ============================================
+
+# Column letter of the Google Form "Timestamp" column, e.g. "A". When set,
+# gviz sheets are polled for new rows only, with a full pass every
+# SYNC_FULL_EVERY runs to pick up edits and deletions.
+SYNC_TIMESTAMP_COLUMN = os.getenv("SYNC_TIMESTAMP_COLUMN", "")
+SYNC_FULL_EVERY = int(os.getenv("SYNC_FULL_EVERY", "10"))
+
+
+def fingerprint(record):
+    encoded = json.dumps(record, sort_keys=True, default=list, ensure_ascii=False).encode()
+    return hashlib.blake2b(encoded, digest_size=8).digest()
+
+
+class Changes:
+    __slots__ = ("upserts", "deletes", "inserted", "updated", "unchanged")
+
+    def __init__(self):
+        self.upserts = {}
+        self.deletes = []
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+
+    def __bool__(self):
+        return bool(self.upserts or self.deletes)
+
+
+class Fingerprints:
+    def __init__(self, records=None):
+        self._prints = {key: fingerprint(record) for key, record in (records or {}).items()}
+
+    def __len__(self):
+        return len(self._prints)
+
+    def diff(self, records, complete=True):
+        # complete=False means records is only a slice of the sheet, so
+        # missing keys are not deletions
+        changes = Changes()
+        for key, record in records.items():
+            new = fingerprint(record)
+            old = self._prints.get(key)
+            if old == new:
+                changes.unchanged += 1
+                continue
+            if old is None:
+                changes.inserted += 1
+            else:
+                changes.updated += 1
+            changes.upserts[key] = record
+            self._prints[key] = new
+        if complete:
+            changes.deletes = [key for key in self._prints if key not in records]
+            for key in changes.deletes:
+                del self._prints[key]
+        return changes
+
+
+def column_index(letter):
+    index = 0
+    for char in letter.upper():
+        index = index * 26 + string.ascii_uppercase.index(char) + 1
+    return index - 1
+
+
+def rows_after_url(url, column, timestamp):
+    query = f"select * where {column} > datetime '{timestamp:%Y-%m-%d %H:%M:%S}'"
+    return f"{url}&tq={quote(query)}"
+
+
+class SheetSync:
+    # build(df) -> {key: record}; load(store) -> same shape; apply(store, upserts, deletes)
+    def __init__(self, sheet_name, url, build, load, apply, timestamp_column=SYNC_TIMESTAMP_COLUMN, full_every=SYNC_FULL_EVERY):
+        self.sheet_name = sheet_name
+        self.url = url
+        self.build = build
+        self.load = load
+        self.apply = apply
+        self.timestamp_column = timestamp_column
+        if timestamp_column and sheet_name in SHEET_SCHEMAS:
+            SHEET_SCHEMAS[sheet_name].keep_position(column_index(timestamp_column))
+        self.full_every = max(1, full_every)
+        self.fingerprints = None
+        self.version = None
+        self.high_water = None
+        self.runs = 0
+        # False while the last run failed (e.g. a new-rows fetch that the sheet cache never sees)
+        self.healthy = True
+
+    def __call__(self, store):
+        try:
+            changes = self._sync(store)
+        except Exception:
+            self.healthy = False
+            raise
+        self.healthy = True
+        return changes
+
+    def _sync(self, store):
+        if self.fingerprints is None:
+            self.fingerprints = Fingerprints(self.load(store))
+        url = self.url()
+        incremental = (
+            self.timestamp_column
+            and "/gviz/tq" in url
+            and self.high_water is not None
+            and self.runs % self.full_every != 0
+        )
+        self.runs += 1
+        if incremental:
+            df = read_csv_url(rows_after_url(url, self.timestamp_column, self.high_water), self.sheet_name)
+        else:
+            df = sheet_cache.get(url, self.sheet_name)
+            version = sheet_cache.version(url)
+            if version == self.version:
+                return None
+            self.version = version
+        records = self.build(df)
+        changes = self.fingerprints.diff(records, complete=not incremental)
+        if changes:
+            self.apply(store, changes.upserts, changes.deletes)
+        self._advance_high_water(df)
+        store.mark_synced(self.sheet_name, self.version, len(self.fingerprints), changes.inserted, changes.updated, len(changes.deletes))
+        mode = "new rows" if incremental else "full"
+        print(
+            f"🔄 Synced {self.sheet_name} ({mode}): +{changes.inserted} ~{changes.updated} "
+            f"-{len(changes.deletes)} ({changes.unchanged} unchanged)"
+        )
+        return changes
+
+    def _advance_high_water(self, df):
+        if not self.timestamp_column or df.empty:
+            return
+        # Sheets are parsed with only the columns in use, so the letter is
+        # resolved against the original header
+        header = df.attrs.get("source_columns", list(df.columns))
+        position = column_index(self.timestamp_column)
+        if position >= len(header) or header[position] not in df.columns:
+            return
+        timestamps = pd.to_datetime(df[header[position]], errors="coerce").dropna()
+        if not timestamps.empty:
+            latest = timestamps.max().to_pydatetime()
+            self.high_water = latest if self.high_water is None else max(self.high_water, latest)
@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+
+from admission import Admission, Busy, RateLimiter, admission_debounced
+
+
+def test_bucket_allows_a_burst_then_refills_at_the_rate():
+    limiter = RateLimiter(rate=0.5, burst=2)
+    assert limiter.take(("a",), now=0) == 0
+    assert limiter.take(("a",), now=0) == 0
+    assert limiter.take(("a",), now=0) == pytest.approx(2)
+    assert limiter.take(("a",), now=1) == pytest.approx(1)
+    assert limiter.take(("a",), now=2) == 0
+
+
+def test_rejected_take_spends_no_token_from_any_key():
+    limiter = RateLimiter(rate=1, burst=1)
+    assert limiter.take(("session",), now=0) == 0
+    assert limiter.take(("session", "email"), now=0) == pytest.approx(1)
+    assert limiter.take(("email",), now=0) == 0
+
+
+def test_idle_keys_are_forgotten_first():
+    limiter = RateLimiter(rate=0, burst=1, max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.take((key,), now=0)
+    # "a" was dropped, so it starts again with a full bucket
+    assert limiter.take(("a",), now=0) == 0
+    assert limiter.take(("c",), now=0) > 0
+
+
+def debounced(path):
+    return admission_debounced._values.get((path,), 0)
+
+
+def run_joined(admission, fn, *clients):
+    # Starts a leader blocked in fn and one identical request per client,
+    # then lets the leader finish once every one of them has joined it
+    started, release = threading.Event(), threading.Event()
+    calls = []
+    outcomes = []
+
+    def blocked():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return fn()
+
+    def call(client):
+        try:
+            outcomes.append(("ok", admission.run((client,), "key", blocked)))
+        except Exception as e:
+            outcomes.append(("error", str(e)))
+
+    before = debounced(admission.path)
+    threads = [threading.Thread(target=call, args=("leader",))]
+    threads[0].start()
+    started.wait(5)
+    threads += [threading.Thread(target=call, args=(client,)) for client in clients]
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while debounced(admission.path) - before < len(clients) and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return calls, outcomes
+
+
+def test_identical_requests_share_one_call():
+    # Followers spend no token, so their empty buckets do not matter
+    limiter = RateLimiter(rate=0, burst=1)
+    limiter.take(("s1",), now=0)
+    admission = Admission("test-join", limiter=limiter, slots=threading.BoundedSemaphore(4))
+    calls, outcomes = run_joined(admission, lambda: "found", "s1", "s2")
+    assert len(calls) == 1
+    assert outcomes == [("ok", "found")] * 3
+
+
+def test_followers_get_the_leaders_error():
+    admission = Admission("test-error", limiter=RateLimiter(rate=0, burst=5), slots=threading.BoundedSemaphore(4))
+
+    def failing():
+        raise ValueError("sheet down")
+
+    calls, outcomes = run_joined(admission, failing, "s2")
+    assert len(calls) == 1
+    assert outcomes == [("error", "sheet down")] * 2
+
+
+def test_full_in_flight_cap_turns_requests_away():
+    admission = Admission("test", limiter=RateLimiter(rate=1, burst=5), slots=threading.BoundedSemaphore(1), retry_after=3)
+    admission._slots.acquire()
+    with pytest.raises(Busy) as busy:
+        admission.run(("s",), "key", lambda: "never")
+    assert busy.value.retry_after == 3
+    admission._slots.release()
+    assert admission.run(("s",), "key", lambda: "ok") == "ok"
@@ -0,0 +1,96 @@
+import os
+
+import pandas as pd
+import pytest
+
+import batch
+from batch import Bundles, read_manifest, run, version_dir
+
+
+@pytest.fixture
+def sources(tmp_path):
+    return write_sheets(tmp_path, ["G1", "G2", "G3", "G4"])
+
+
+def write_sheets(tmp_path, group_ids):
+    students = pd.DataFrame(
+        [{"email": f"s{i}@uni.edu", "name": f"Student {i}", "group_id": group_id} for i, group_id in enumerate(group_ids)]
+    )
+    groups = pd.DataFrame([
+        {"group_id": group_id, "subject": "DS", "member_names": f"Student {i}", "topics": "Trees", "member_emails": f"s{i}@uni.edu"}
+        for i, group_id in enumerate(group_ids)
+    ])
+    challenges = pd.DataFrame([
+        {"session_id": f"S-{group_id}", "group_id": group_id, "challenge_number": 1,
+         "description": f"Challenge for {group_id}", "topics_involved": "Trees", "hints_json": '["a"]'}
+        for group_id in group_ids
+    ])
+    paths = {}
+    for sheet, df in (("Students", students), ("Groups", groups), ("Challenges", challenges)):
+        paths[sheet] = str(tmp_path / f"{sheet}.csv")
+        df.to_csv(paths[sheet], index=False)
+    return paths
+
+
+def build(sources, out, **kwargs):
+    return run(sources, out, partitions=2, workers=1, **kwargs)
+
+
+def test_bundles_are_served_from_the_manifests_version(sources, tmp_path):
+    out = str(tmp_path / "bundles")
+    manifest = build(sources, out)
+    assert manifest["version"] == 1 and manifest["students"] == 4
+    assert read_manifest(out) == manifest
+    assert not os.path.exists(os.path.join(out, "work"))
+
+    bundles = Bundles(out)
+    assert bundles.student("s1@uni.edu") == ["Student 1", "G2"]
+    group = bundles.group("G2")
+    assert group["subject"] == "DS"
+    assert group["challenges"]["S-G2"][0]["description"] == "Challenge for G2"
+    assert sorted(bundles.emails()) == ["s0@uni.edu", "s1@uni.edu", "s2@uni.edu", "s3@uni.edu"]
+
+
+def test_each_run_gets_a_new_version_and_old_ones_are_pruned(sources, tmp_path):
+    out = str(tmp_path / "bundles")
+    build(sources, out)
+    bundles = Bundles(out)
+    assert bundles.group("G4") is not None
+
+    # G4 is dropped from the sheets: the new version no longer has it
+    build(write_sheets(tmp_path, ["G1", "G2", "G3"]), out)
+    assert read_manifest(out)["version"] == 2
+    assert bundles.group("G4") is None
+    assert bundles.group("G1") is not None
+    # The previous version stays for workers that just read the old manifest
+    assert os.path.isdir(version_dir(out, 1))
+
+    build(sources, out)
+    assert sorted(os.listdir(out)) == ["manifest.json", "v2", "v3"]
+
+
+def failing_partition(out, root, part):
+    if part == 1:
+        raise RuntimeError("worker died")
+    return real_build_partition(out, root, part)
+
+
+real_build_partition = batch.build_partition
+
+
+def test_interrupted_run_resumes_with_the_unfinished_partitions(monkeypatch, sources, tmp_path, capsys):
+    out = str(tmp_path / "bundles")
+    # Worker processes are forked, so they see the patched function
+    monkeypatch.setattr(batch, "build_partition", failing_partition)
+    with pytest.raises(RuntimeError):
+        build(sources, out)
+    assert read_manifest(out) is None
+    assert os.path.exists(os.path.join(out, "work", "0000", "done"))
+
+    monkeypatch.setattr(batch, "build_partition", real_build_partition)
+    capsys.readouterr()
+    manifest = build(sources, out)
+    printed = capsys.readouterr().out
+    assert "Resuming" in printed and "1/2 partitions already built" in printed
+    assert manifest["version"] == 1 and manifest["students"] == 4
+    assert Bundles(out).student("s0@uni.edu") == ["Student 0", "G1"]
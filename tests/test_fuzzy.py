@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from fuzzy import LatestIndex, Pattern, TrigramIndex
+
+
+def levenshtein(a, b):
+    row = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        previous, row[0] = row[0], i
+        for j, cb in enumerate(b, start=1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (ca != cb))
+    return row[-1]
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    ("", "", 0),
+    ("", "abc", 3),
+    ("kitten", "sitting", 3),
+    ("alice@uni.edu", "alcie@uni.edu", 2),
+    ("alice@uni.edu", "alice@uni.edu", 0),
+])
+def test_distance_of_known_pairs(a, b, expected):
+    assert Pattern(a).distance(b, 10) == expected
+
+
+def test_distance_matches_the_dynamic_programming_answer():
+    rng = random.Random(7)
+    for _ in range(500):
+        a = "".join(rng.choice("abc.@") for _ in range(rng.randint(1, 70)))
+        b = "".join(rng.choice("abc.@") for _ in range(rng.randint(0, 70)))
+        assert Pattern(a).distance(b, 100) == levenshtein(a, b)
+
+
+def test_distance_stops_at_the_limit():
+    assert Pattern("abcdef").distance("uvwxyz", 2) == 3
+    # Lengths alone rule this one out
+    assert Pattern("a").distance("abcd", 2) == 3
+
+
+def test_suggest_finds_the_closest_key_within_the_limit():
+    index = TrigramIndex(["alice@uni.edu", "alina@uni.edu", "bob@uni.edu", "alice@uni.edu"])
+    assert len(index) == 3
+    assert index.suggest("alcie@uni.edu") == "alice@uni.edu"
+    assert index.suggest("bob@uni.ed") == "bob@uni.edu"
+    assert index.suggest("carol@college.org") is None
+    assert index.suggest("") is None
+    assert TrigramIndex([]).suggest("alice@uni.edu") is None
+
+
+def test_suggest_respects_max_distance():
+    index = TrigramIndex(["alice@uni.edu"])
+    assert index.suggest("alxxe@uni.edu", max_distance=1) is None
+    assert index.suggest("alxxe@uni.edu", max_distance=2) == "alice@uni.edu"
+
+
+def test_latest_index_is_rebuilt_only_for_a_new_version():
+    builds = []
+
+    def keys():
+        builds.append(1)
+        return ["alice@uni.edu"]
+
+    latest = LatestIndex()
+    first = latest.get(1, keys)
+    assert latest.get(1, keys) is first
+    assert latest.get(2, keys) is not first
+    assert len(builds) == 2
@@ -0,0 +1,52 @@
+import pytest
+
+import app
+from store import Store
+
+
+class FakeGenerator:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, group_id, subject, topics, done):
+        self.submitted.append(group_id)
+        done(group_id, ({"challenge_number": 1, "description": f"Generated for {group_id}", "topics_involved": "Trees", "hints": ("a",)},))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return Store(str(tmp_path / "synchrony.db"))
+
+
+@pytest.fixture
+def generator(monkeypatch, store):
+    fake = FakeGenerator()
+    monkeypatch.setattr(app, "data_source", app.StoreSource(store))
+    monkeypatch.setattr(app, "generated_challenges", app.GeneratedChallenges(store))
+    monkeypatch.setattr(app, "challenge_generator", fake)
+    return fake
+
+
+def test_nothing_is_generated_before_the_challenges_sheet_is_synced(generator):
+    assert app.get_challenges_for_session("S-G1", "G1") == app.MOCK_CHALLENGES
+    assert generator.submitted == []
+
+
+def test_nothing_is_generated_while_the_challenges_sheet_is_down(generator, store):
+    store.mark_synced("Challenges", 1, 0, 0, 0, 0)
+    store.save_sheet_health({"Challenges": False})
+    assert app.get_challenges_for_session("S-G1", "G1") == app.MOCK_CHALLENGES
+    assert generator.submitted == []
+
+
+def test_generated_set_is_shared_through_the_store(generator, store):
+    store.mark_synced("Challenges", 1, 0, 0, 0, 0)
+    assert app.get_challenges_for_session("S-G1", "G1") == app.MOCK_CHALLENGES
+    assert generator.submitted == ["G1"]
+
+    # Another worker (or a restarted one) serves the same set without generating
+    other = app.GeneratedChallenges(Store(store.path))
+    generation, challenges = other.get("G1")
+    assert generation and challenges[0]["description"] == "Generated for G1"
+    assert app.get_challenges_for_session("S-G1", "G1") == challenges
+    assert generator.submitted == ["G1"]
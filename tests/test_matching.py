@@ -0,0 +1,59 @@
+from collections import Counter
+
+import pandas as pd
+
+from matching import Matcher, Registrant, match_students
+
+
+def registrants(subject, topics):
+    return [Registrant(f"{subject}{i}@uni.edu", f"Student {i}", subject, topic) for i, topic in enumerate(topics)]
+
+
+def test_fit_spreads_each_topic_across_groups():
+    students = registrants("DS", ["Trees"] * 4 + ["Graphs"] * 4 + ["Heaps"] * 4)
+    matcher = Matcher(group_size=3).fit(students)
+    assert len(matcher.groups) == 4
+    for group in matcher.groups.values():
+        assert len(group.members) == 3
+        assert max(group.topic_counts.values()) == 1
+    assert len(matcher.assignments) == 12
+
+
+def test_fit_never_mixes_subjects():
+    matcher = Matcher(group_size=2).fit(registrants("DS", ["Trees", "Graphs"]) + registrants("OS", ["Paging"]))
+    subjects = {group.group_id: {member.subject for member in group.members} for group in matcher.groups.values()}
+    assert sorted(len(s) for s in subjects.values()) == [1, 1]
+    assert matcher.assignments["OS0@uni.edu"] != matcher.assignments["DS0@uni.edu"]
+
+
+def test_late_registrant_joins_the_open_group_missing_their_topic():
+    matcher = Matcher(group_size=3).fit(registrants("DS", ["Trees", "Graphs", "Trees", "Heaps"]))
+    late = Registrant("late@uni.edu", "Late", "DS", "Heaps")
+    group_id = matcher.add(late)
+    assert matcher.groups[group_id].topic_counts["Heaps"] == 1
+    # Adding the same email again keeps the assignment
+    assert matcher.add(late) == group_id
+    assert Counter(matcher.assignments.values())[group_id] == len(matcher.groups[group_id].members)
+
+
+def test_full_groups_get_a_new_one():
+    matcher = Matcher(group_size=1).fit(registrants("DS", ["Trees"]))
+    assert matcher.add(Registrant("late@uni.edu", "Late", "DS", "Trees")) == "G002"
+
+
+def test_existing_groups_are_kept_and_only_unassigned_students_added():
+    existing = pd.DataFrame([{
+        "group_id": "G007", "subject": "DS", "member_names": "Ann, Ben",
+        "topics": "Trees, Graphs", "member_emails": "ann@uni.edu, ben@uni.edu",
+    }])
+    students = pd.DataFrame([
+        {"email": "ann@uni.edu", "name": "Ann", "subject": "DS", "topic": "Trees", "group_id": "G007"},
+        {"email": "cat@uni.edu", "name": "Cat", "subject": "DS", "topic": "Heaps", "group_id": None},
+    ])
+    matcher = match_students(students, group_size=3, existing_groups_df=existing)
+    assert matcher.assignments["cat@uni.edu"] == "G007"
+    assert list(matcher.groups) == ["G007"]
+    frame = matcher.groups_frame()
+    assert frame.loc[0, "member_emails"] == "ann@uni.edu, ben@uni.edu, cat@uni.edu"
+    # New groups are numbered after the existing ones
+    assert matcher.add(Registrant("dan@uni.edu", "Dan", "OS", "Paging")) == "G008"
@@ -0,0 +1,109 @@
+import os
+import time
+
+import pytest
+
+from sheets import SheetCache, SheetUnavailable
+
+SHEET = "Test Sheet"
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "sheet.csv"
+    write(path, "one")
+    return str(path)
+
+
+def write(path, value):
+    # A new mtime each time, so the file's validator always changes
+    with open(path, "w") as f:
+        f.write(f"email,name\na@uni.edu,{value}\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def names(df):
+    return list(df["name"])
+
+
+def wait_for_refresh(cache):
+    deadline = time.monotonic() + 5
+    while cache._flights and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def allow_retry(cache, path):
+    # Skips the negative TTL or the cooldown instead of sleeping through it
+    cache._breakers[path].retry_at = 0.0
+
+
+def test_fresh_copy_is_served_from_cache(csv_path):
+    cache = SheetCache(ttl=60)
+    first = cache.get(csv_path, SHEET)
+    write(csv_path, "two")
+    assert cache.get(csv_path, SHEET) is first
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_copy_is_served_while_it_is_revalidated(csv_path):
+    cache = SheetCache(ttl=0, stale_ttl=600)
+    assert names(cache.get(csv_path, SHEET)) == ["one"]
+    write(csv_path, "two")
+    # Answered at once with the old copy; the refresh runs in the background
+    assert names(cache.get(csv_path, SHEET)) == ["one"]
+    wait_for_refresh(cache)
+    assert names(cache.get(csv_path, SHEET)) == ["two"]
+    assert cache.stats()["stale_hits"] == 2
+    assert cache.version(csv_path) == 2
+
+
+def test_failed_revalidation_keeps_the_stale_copy(csv_path):
+    cache = SheetCache(ttl=0, stale_ttl=600)
+    cache.get(csv_path, SHEET)
+    os.remove(csv_path)
+    assert names(cache.get(csv_path, SHEET)) == ["one"]
+    wait_for_refresh(cache)
+    assert names(cache.get(csv_path, SHEET)) == ["one"]
+    assert cache.stats()["errors"] == 1
+    assert cache.version(csv_path) == 1
+
+
+def test_failure_is_answered_at_once_within_the_negative_ttl(tmp_path):
+    cache = SheetCache()
+    missing = str(tmp_path / "missing.csv")
+    with pytest.raises(FileNotFoundError):
+        cache.get(missing, SHEET)
+    with pytest.raises(SheetUnavailable):
+        cache.get(missing, SHEET)
+    assert cache.stats()["short_circuits"] == 1
+    assert cache.circuits() == {SHEET: "closed"}
+
+
+def test_circuit_opens_after_repeated_failures_and_closes_after_a_good_probe(tmp_path):
+    cache = SheetCache()
+    path = str(tmp_path / "sheet.csv")
+    for _ in range(3):
+        with pytest.raises(FileNotFoundError):
+            cache.get(path, SHEET)
+        allow_retry(cache, path)
+    assert cache.circuits() == {SHEET: "open"}
+
+    write(path, "back")
+    allow_retry(cache, path)
+    assert names(cache.get(path, SHEET)) == ["back"]
+    assert cache.circuits() == {SHEET: "closed"}
+
+
+def test_open_circuit_serves_the_last_good_copy_without_fetching(csv_path):
+    cache = SheetCache(ttl=0, stale_ttl=0)
+    cache.get(csv_path, SHEET)
+    os.remove(csv_path)
+    for _ in range(3):
+        assert names(cache.get(csv_path, SHEET)) == ["one"]
+        allow_retry(cache, csv_path)
+    assert cache.circuits() == {SHEET: "open"}
+    cache._breakers[csv_path].retry_at = time.monotonic() + 60
+    errors = cache.stats()["errors"]
+    assert names(cache.get(csv_path, SHEET)) == ["one"]
+    assert cache.stats()["errors"] == errors
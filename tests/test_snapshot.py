@@ -0,0 +1,88 @@
+import os
+import struct
+
+import pytest
+
+from snapshot import ENTRY, HEADER, MAGIC, Snapshot, SnapshotReader, key_hash, read_status, write_snapshot, write_status
+
+TABLES = {
+    "students": {"ann@uni.edu": ["Ann", "G1"], "ben@uni.edu": ["Ben", "G2"], "émile@uni.edu": ["Émile", "G1"]},
+    "groups": {"G1": ["DS", [["Ann", "Trees", "ann@uni.edu"]]]},
+}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "roster.snap")
+
+
+def test_records_are_found_by_key(path):
+    write_snapshot(path, TABLES, 7)
+    snapshot = Snapshot(path)
+    assert snapshot.version == 7
+    assert snapshot.count("students") == 3 and snapshot.count("missing") == 0
+    assert snapshot.get("students", "émile@uni.edu") == ["Émile", "G1"]
+    assert snapshot.get("groups", "G1") == ["DS", [["Ann", "Trees", "ann@uni.edu"]]]
+    assert snapshot.get("students", "carl@uni.edu") is None
+    assert snapshot.get("missing", "G1") is None
+    assert snapshot.get("students", None) is None
+    assert sorted(snapshot.keys("students")) == sorted(TABLES["students"])
+
+
+def test_header_and_index_layout(path):
+    write_snapshot(path, TABLES, 3)
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, fmt, version, written_at, count = HEADER.unpack_from(data, 0)
+    assert (magic, fmt, version, count) == (MAGIC, 1, 3, 2)
+    snapshot = Snapshot(path)
+    index_offset, entries = snapshot.tables["students"]
+    hashes = [struct.unpack_from("<Q", data, index_offset + i * ENTRY.size)[0] for i in range(entries)]
+    assert hashes == sorted(key_hash(key) for key in TABLES["students"])
+
+
+def test_colliding_hashes_are_told_apart_by_key(monkeypatch, path):
+    monkeypatch.setattr("snapshot.key_hash", lambda key: 42)
+    write_snapshot(path, TABLES, 1)
+    snapshot = Snapshot(path)
+    assert snapshot.get("students", "ben@uni.edu") == ["Ben", "G2"]
+    assert snapshot.get("students", "ann@uni.edu") == ["Ann", "G1"]
+
+
+def test_other_files_are_rejected(path):
+    with open(path, "wb") as f:
+        f.write(b"not a snapshot".ljust(HEADER.size, b"\0"))
+    with pytest.raises(ValueError):
+        Snapshot(path)
+
+
+def test_reader_switches_to_a_renamed_in_file(path):
+    reader = SnapshotReader(path, check_interval=0)
+    with pytest.raises(FileNotFoundError):
+        reader.current()
+    write_snapshot(path, TABLES, 1)
+    first = reader.current()
+    assert first.version == 1
+    assert reader.current() is first
+
+    write_snapshot(path, {"students": {"ann@uni.edu": ["Ann", "G9"]}}, 2)
+    second = reader.current()
+    assert second.version == 2 and second.get("students", "ann@uni.edu") == ["Ann", "G9"]
+    # A lookup that still holds the old map keeps reading it
+    assert first.get("students", "ann@uni.edu") == ["Ann", "G1"]
+
+
+def test_reader_checks_for_a_new_file_only_every_interval(path):
+    write_snapshot(path, TABLES, 1)
+    reader = SnapshotReader(path, check_interval=3600)
+    assert reader.current().version == 1
+    write_snapshot(path, TABLES, 2)
+    assert reader.current().version == 1
+
+
+def test_status_is_written_beside_the_snapshot(path):
+    assert read_status(path) is None
+    write_status(path, ["Groups", "Challenges"])
+    status = read_status(path)
+    assert status["down"] == ["Challenges", "Groups"]
+    assert os.path.exists(f"{path}.status")
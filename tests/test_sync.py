@@ -0,0 +1,182 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import app
+import sync
+from store import Store
+from sync import Fingerprints, SheetSync
+
+URL = "https://docs.google.com/spreadsheets/d/test/gviz/tq?tqx=out:csv&sheet=Challenges"
+COLUMNS = ["Timestamp", "session_id", "group_id", "challenge_number", "description", "topics_involved", "hints_json"]
+
+
+def challenge_rows(*rows):
+    return pd.DataFrame(
+        [["2026-01-0%d 10:00:00" % number, "S-G1", "G1", str(number), description, "Trees", '["a"]'] for number, description in rows],
+        columns=COLUMNS,
+    )
+
+
+class FakeSheetCache:
+    def __init__(self):
+        self.df = None
+        self.versions = 0
+
+    def set(self, df):
+        self.df = df
+        self.versions += 1
+
+    def get(self, url, sheet_name="Unknown"):
+        return self.df
+
+    def version(self, url):
+        return self.versions
+
+
+@pytest.fixture
+def sheets(monkeypatch):
+    cache = FakeSheetCache()
+    slices = []
+    monkeypatch.setattr(sync, "sheet_cache", cache)
+    monkeypatch.setattr(sync, "read_csv_url", lambda url, sheet_name: slices.pop(0))
+    return cache, slices
+
+
+@pytest.fixture
+def store(tmp_path):
+    return Store(str(tmp_path / "synchrony.db"))
+
+
+def challenge_sync(full_every=10, timestamp_column="A"):
+    # Not "Challenges", so the shared schema's kept columns are left alone
+    return SheetSync(
+        "Test Challenges", lambda: URL, app.challenge_records, Store.load_challenges, Store.apply_challenges,
+        timestamp_column=timestamp_column, full_every=full_every,
+    )
+
+
+def descriptions(store, lookup_key):
+    return [(challenge["challenge_number"], challenge["description"]) for challenge in store.challenges(lookup_key)]
+
+
+def test_diff_counts_inserts_updates_and_deletes():
+    fingerprints = Fingerprints({"a": 1, "b": 2, "c": 3})
+    changes = fingerprints.diff({"a": 1, "b": 20, "d": 4})
+    assert (changes.inserted, changes.updated, changes.unchanged) == (1, 1, 1)
+    assert changes.upserts == {"b": 20, "d": 4}
+    assert changes.deletes == ["c"]
+    assert len(fingerprints) == 3
+
+
+def test_diff_of_a_slice_deletes_nothing():
+    fingerprints = Fingerprints({"a": 1, "b": 2})
+    changes = fingerprints.diff({"c": 3}, complete=False)
+    assert changes.upserts == {"c": 3}
+    assert changes.deletes == []
+    assert len(fingerprints) == 3
+    assert not fingerprints.diff({"a": 1}, complete=False)
+
+
+def test_unchanged_sheet_version_is_skipped(sheets, store):
+    cache, _ = sheets
+    cache.set(challenge_rows((1, "one")))
+    job = challenge_sync(timestamp_column="")
+    assert job(store).inserted == 2
+    assert job(store) is None
+
+
+def test_new_rows_slice_keeps_stored_challenges(sheets, store):
+    cache, slices = sheets
+    cache.set(challenge_rows((1, "one"), (2, "two")))
+    job = challenge_sync()
+    job(store)
+    assert job.high_water == datetime(2026, 1, 2, 10)
+
+    slices.append(challenge_rows((3, "three")))
+    changes = job(store)
+    assert (changes.inserted, changes.updated, len(changes.deletes)) == (2, 0, 0)
+    for key in ("S-G1", "G1"):
+        assert descriptions(store, key) == [(1, "one"), (2, "two"), (3, "three")]
+    assert job.high_water == datetime(2026, 1, 3, 10)
+
+
+def test_edited_row_in_slice_updates_only_that_challenge(sheets, store):
+    cache, slices = sheets
+    cache.set(challenge_rows((1, "one"), (2, "two")))
+    job = challenge_sync()
+    job(store)
+
+    slices.append(challenge_rows((2, "two, reworded")))
+    changes = job(store)
+    assert (changes.inserted, changes.updated) == (0, 2)
+    assert descriptions(store, "G1") == [(1, "one"), (2, "two, reworded")]
+
+
+def test_full_pass_after_slices_removes_deleted_rows(sheets, store):
+    cache, slices = sheets
+    cache.set(challenge_rows((1, "one"), (2, "two")))
+    job = challenge_sync(full_every=2)
+    job(store)
+    slices.append(challenge_rows((3, "three")))
+    job(store)
+
+    cache.set(challenge_rows((1, "one"), (3, "three")))
+    changes = job(store)
+    assert len(changes.deletes) == 2
+    assert descriptions(store, "S-G1") == [(1, "one"), (3, "three")]
+
+
+def test_fingerprints_resume_from_store(sheets, store):
+    cache, _ = sheets
+    cache.set(challenge_rows((1, "one"), (2, "two")))
+    challenge_sync()(store)
+
+    changes = challenge_sync()(store)
+    assert (changes.inserted, changes.updated, changes.unchanged) == (0, 0, 4)
+
+
+def test_cohort_view_rebuilt_only_after_a_full_pass(monkeypatch, store):
+    builds = []
+    monkeypatch.setattr(app, "build_cohort_view", lambda: builds.append(1) or app.view_from_payload(None))
+    sheets = [challenge_sync(), challenge_sync()]
+    cohort = app.CohortSync(sheets)
+    cohort(store)
+    assert builds == [] and store.cohort_version() is None
+
+    sheets[0].version = sheets[1].version = 1
+    cohort(store)
+    cohort(store)
+    assert len(builds) == 1 and store.cohort_view()["summary"]["groups"] == 0
+
+    sheets[1].version = 2
+    cohort(store)
+    assert len(builds) == 2
+
+
+
+def test_failed_new_rows_fetch_is_reported_to_store_readers(monkeypatch, sheets, store):
+    cache, _ = sheets
+    cache.set(challenge_rows((1, "one")))
+    job = challenge_sync()
+    job(store)
+    health = app.SheetHealth([job])
+    health(store)
+    assert app.StoreSource(store).down_sheets() == []
+
+    def unreachable(url, sheet_name):
+        raise ConnectionError("sheet unreachable")
+
+    monkeypatch.setattr(sync, "read_csv_url", unreachable)
+    with pytest.raises(ConnectionError):
+        job(store)
+    health(store)
+    assert app.StoreSource(store).down_sheets() == ["Test Challenges"]
+
+
+def test_stopped_sync_job_is_reported_to_store_readers(monkeypatch, store):
+    app.SheetHealth([challenge_sync()])(store)
+    assert app.StoreSource(store).down_sheets() == []
+    monkeypatch.setattr(app, "REFRESHER_MISSED_CHECKS", -1)
+    assert app.StoreSource(store).down_sheets() == ["Test Challenges"]